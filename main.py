@@ -5,6 +5,11 @@ import os
 from dotenv import load_dotenv
 import signal
 
+try:
+    import uvloop
+except ImportError:  # Windows では uvloop が使えないため標準のイベントループを使う
+    uvloop = None
+
 # ロガー関連のインポート
 from src.utils.logger import setup_logger, console
 from rich.table import Table
@@ -89,6 +94,13 @@ class SumireVox(commands.Bot):
             logger.error(f"データベースの初期化に失敗しました: {e}")
             raise
 
+        try:
+            await self.vv_client.warmup()
+            logger.success("VOICEVOX エンジンへの接続を確立しました")
+        except Exception as e:
+            # エンジンの起動が遅れていても、最初の読み上げ時に改めて接続する
+            logger.warning(f"VOICEVOX エンジンへの事前接続に失敗しました: {e}")
+
         logger.info("Cogs の読み込みを開始します")
         # サブBotの場合、読み上げ以外のCog（Commands, Boost等）を読み込まないようにフィルタリング
         target_cogs = COGS
@@ -210,6 +222,11 @@ if __name__ == "__main__":
     token = os.getenv("DISCORD_TOKEN")
 
     if token:
+        # bot.run() がループを作成する前にポリシーを差し替える
+        if uvloop is not None:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            logger.info("イベントループに uvloop を使用します")
+
         try:
             bot = SumireVox()
             bot.run(token, log_handler=None)  # 標準のロガーを無効化して loguru に一本化
@@ -106,20 +106,18 @@ class Boost(commands.Cog):
 
                 # ブースター一覧の表示（複数対応）
                 booster_names = []
-                async with self.db.pool.acquire() as conn:
-                    boosters = await conn.fetch("SELECT user_id FROM guild_boosts WHERE guild_id = $1::BIGINT",
-                                                int(guild_id))
-                    for b in boosters:
-                        uid = b["user_id"]
-                        member = interaction.guild.get_member(int(uid))
-                        if not member:
-                            try:
-                                member = await self.bot.fetch_user(int(uid))
-                            except:
-                                member = f"ID: {uid}"
-
-                        name = member.mention if isinstance(member, (discord.Member, discord.User)) else member
-                        booster_names.append(name)
+                # Discord API を待つ間に DB 接続を占有しないよう、先に一覧を取得する
+                boosters = await self.db.get_guild_boosters(guild_id)
+                for uid in boosters:
+                    member = interaction.guild.get_member(int(uid))
+                    if not member:
+                        try:
+                            member = await self.bot.fetch_user(int(uid))
+                        except:
+                            member = f"ID: {uid}"
+
+                    name = member.mention if isinstance(member, (discord.Member, discord.User)) else member
+                    booster_names.append(name)
 
                 embed.add_field(name="ブースター", value="\n".join(booster_names) or "不明")
                 embed.set_thumbnail(url="https://cdn.discordapp.com/emojis/715774843200110603.gif?v=1")
@@ -154,12 +152,7 @@ class Boost(commands.Cog):
 
         try:
             # 自分がこのサーバーをブーストしているか、何個ブーストしているか確認
-            async with self.db.pool.acquire() as conn:
-                user_boost_count = await conn.fetchval(
-                    "SELECT COUNT(*) FROM guild_boosts WHERE guild_id = $1::BIGINT AND user_id = $2",
-                    int(guild_id),
-                    str(user_id)
-                )
+            user_boost_count = await self.db.get_user_guild_boost_count(guild_id, user_id)
 
             if user_boost_count == 0:
                 await interaction.followup.send("このサーバーにあなたのブーストは見つかりませんでした。", ephemeral=True)
@@ -8,7 +8,6 @@ from ..validators.is_katakana import is_katakana
 async def dictionary_add(
     bot,
     interaction: discord.Interaction,
-    words_dict: dict,
     word: str,
     reading: str
 ) -> None:
@@ -28,10 +27,8 @@ async def dictionary_add(
         )
         return await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    words_dict[word] = reading
-
     try:
-        await bot.db.add_or_update_dict(interaction.guild.id, words_dict)
+        await bot.db.add_dict_entry(interaction.guild.id, word, reading)
         embed = discord.Embed(
             title="✅ 辞書に追加しました",
             description=f"**{word}** → **{reading}**",
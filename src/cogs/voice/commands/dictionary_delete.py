@@ -6,7 +6,6 @@ from loguru import logger
 async def dictionary_delete(
     bot,
     interaction: discord.Interaction,
-    words_dict: dict,
     word: str
 ) -> None:
     if not word:
@@ -17,18 +16,16 @@ async def dictionary_delete(
         )
         return await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    if word not in words_dict:
-        embed = discord.Embed(
-            title="❌ 見つかりません",
-            description=f"**{word}** は辞書に登録されていません。",
-            color=discord.Color.red()
-        )
-        return await interaction.response.send_message(embed=embed, ephemeral=True)
-
-    del words_dict[word]
-
     try:
-        await bot.db.add_or_update_dict(interaction.guild.id, words_dict)
+        removed = await bot.db.remove_dict_entry(interaction.guild.id, word)
+        if not removed:
+            embed = discord.Embed(
+                title="❌ 見つかりません",
+                description=f"**{word}** は辞書に登録されていません。",
+                color=discord.Color.red()
+            )
+            return await interaction.response.send_message(embed=embed, ephemeral=True)
+
         embed = discord.Embed(
             title="✅ 辞書から削除しました",
             description=f"**{word}** を削除しました。",
@@ -47,13 +47,17 @@ async def on_message(
     if is_ignored_prefix(message.content):
         return
 
-    # インスタンスアクティブ判定
-    is_active = await bot.db.is_instance_active(guild_id)
+    # インスタンスアクティブ判定（メッセージごとに呼ばれるため、判定済みならコルーチンを作らない）
+    is_active = bot.db.is_instance_active_cached(guild_id)
+    if is_active is None:
+        is_active = await bot.db.is_instance_active(guild_id)
     if not is_active:
         return
 
     settings = await bot.db.get_guild_settings(guild_id)
-    is_boosted = await bot.db.is_guild_boosted(guild_id)
+    is_boosted = bot.db.is_guild_boosted_cached(guild_id)
+    if is_boosted is None:
+        is_boosted = await bot.db.is_guild_boosted(guild_id)
 
     max_chars = min(settings.max_chars, BOOSTED_MAX_CHARS) if is_boosted else DEFAULT_MAX_CHARS
 
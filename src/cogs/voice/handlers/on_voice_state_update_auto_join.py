@@ -21,7 +21,10 @@ async def on_voice_state_update_auto_join(
     guild_id = member.guild.id
 
     try:
-        is_active = await bot.db.is_instance_active(guild_id)
+        # ボイス状態の更新は頻繁なため、判定済みならコルーチンを作らない
+        is_active = bot.db.is_instance_active_cached(guild_id)
+        if is_active is None:
+            is_active = await bot.db.is_instance_active(guild_id)
         if not is_active:
             return
 
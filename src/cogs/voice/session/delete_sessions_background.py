@@ -0,0 +1,9 @@
+# src/cogs/voice/session/delete_sessions_background.py
+from loguru import logger
+
+
+async def delete_sessions_background(bot, guild_ids: list[int]) -> None:
+    try:
+        await bot.db.delete_voice_sessions(guild_ids)
+    except Exception as e:
+        logger.error(f"セッションの一括削除に失敗 ({len(guild_ids)}件): {e}")
@@ -3,7 +3,7 @@ import asyncio
 from loguru import logger
 
 from .try_restore_session import try_restore_session
-from .delete_session_background import delete_session_background
+from .delete_sessions_background import delete_sessions_background
 
 
 async def restore_voice_sessions(bot, read_channels: dict) -> None:
@@ -21,8 +21,14 @@ async def restore_voice_sessions(bot, read_channels: dict) -> None:
 
     logger.info(f"{len(sessions)}件のセッションを復元中...")
 
+    # 復元するギルドの辞書は1回のクエリでまとめて取得しておく（失敗時は個別に取得される）
+    try:
+        await bot.db.prefetch_guild_dicts([session["guild_id"] for session in sessions])
+    except Exception as e:
+        logger.warning(f"辞書の一括取得に失敗: {e}")
+
     restored = 0
-    failed = 0
+    failed_guild_ids = []
 
     for session in sessions:
         guild_id = session["guild_id"]
@@ -37,7 +43,12 @@ async def restore_voice_sessions(bot, read_channels: dict) -> None:
         if result:
             restored += 1
         else:
-            failed += 1
-            asyncio.create_task(delete_session_background(bot, guild_id))
+            failed_guild_ids.append(guild_id)
+            # 一括取得で接続中として読み込んだ辞書を外す
+            await bot.db.unload_guild_dict(guild_id)
+
+    # 復元できなかったセッションはまとめて1回で削除
+    if failed_guild_ids:
+        asyncio.create_task(delete_sessions_background(bot, failed_guild_ids))
 
-    logger.success(f"セッション復元完了: {restored}件成功, {failed}件失敗")
+    logger.success(f"セッション復元完了: {restored}件成功, {len(failed_guild_ids)}件失敗")
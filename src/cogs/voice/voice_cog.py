@@ -179,16 +179,15 @@ class Voice(commands.Cog):
         word: str = None,
         reading: str = None
     ):
-        words_dict = await get_guild_dict(self.bot, interaction)
-        if words_dict is None:
-            return
-
         if action.value == "list":
+            words_dict = await get_guild_dict(self.bot, interaction)
+            if words_dict is None:
+                return
             await dictionary_list(self.bot, interaction, words_dict)
         elif action.value == "add":
-            await dictionary_add(self.bot, interaction, words_dict, word, reading)
+            await dictionary_add(self.bot, interaction, word, reading)
         elif action.value == "delete":
-            await dictionary_delete(self.bot, interaction, words_dict, word)
+            await dictionary_delete(self.bot, interaction, word)
 
 
 async def setup(bot):
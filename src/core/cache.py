@@ -12,17 +12,17 @@ T = TypeVar('T')
 
 @dataclass
 class CacheEntry(Generic[T]):
-    """TTL付きキャッシュエントリ"""
+    """TTL付きキャッシュエントリ（時刻は単調時計の値で、壁時計の変更に影響されない）"""
     value: T
-    created_at: float = field(default_factory=time.time)
-    last_accessed: float = field(default_factory=time.time)
+    created_at: float = field(default_factory=time.monotonic)
+    last_accessed: float = field(default_factory=time.monotonic)
 
     def is_expired(self, ttl_seconds: float) -> bool:
-        return time.time() - self.created_at > ttl_seconds
+        return time.monotonic() - self.created_at > ttl_seconds
 
     def touch(self):
         """アクセス時刻を更新"""
-        self.last_accessed = time.time()
+        self.last_accessed = time.monotonic()
 
 
 class LRUCache(Generic[T]):
@@ -50,19 +50,28 @@ class LRUCache(Generic[T]):
         entry = self._data.get(key)
         if entry is None:
             return None
-        if entry.is_expired(self._ttl_seconds):
+        # ヒットのたびに呼ばれるため、時刻の取得は1回にまとめる
+        now = time.monotonic()
+        if now - entry.created_at > self._ttl_seconds:
             return None
-        entry.touch()
+        entry.last_accessed = now
         return entry.value
 
     async def set(self, key: int, value: T):
         async with self._lock:
             self._data[key] = CacheEntry(value=value)
-            await self._evict_if_needed()
+            self._evict_if_needed()
 
     def set_sync(self, key: int, value: T):
-        """同期版set（初期ロード時に使用）"""
+        """同期版set（初期ロード・NOTIFY処理時に使用）"""
         self._data[key] = CacheEntry(value=value)
+        self._evict_if_needed()
+
+    def set_many_sync(self, items: Dict[int, T]):
+        """同期版の一括set（エントリ数の確認・追い出しは最後に1回だけ行う）"""
+        for key, value in items.items():
+            self._data[key] = CacheEntry(value=value)
+        self._evict_if_needed()
 
     async def delete(self, key: int) -> bool:
         async with self._lock:
@@ -78,16 +87,16 @@ class LRUCache(Generic[T]):
             return True
         return False
 
-    async def _evict_if_needed(self):
+    def _evict_if_needed(self):
         """LRU方式で古いエントリを削除"""
         if len(self._data) <= self._max_size:
             return
 
         # 期限切れを先に削除
-        now = time.time()
+        now = time.monotonic()
         expired_keys = [
             k for k, v in self._data.items()
-            if v.is_expired(self._ttl_seconds)
+            if now - v.created_at > self._ttl_seconds
         ]
         for key in expired_keys:
             del self._data[key]
@@ -117,15 +126,19 @@ class SettingsCache:
     """インメモリキャッシュマネージャー（改善版）"""
 
     # キャッシュ設定
-    GUILD_SETTINGS_TTL = 3600  # 1時間
+    # 他インスタンスの変更は NOTIFY で、切断中の変更は再接続時の再同期で反映されるため、
+    # TTL は取りこぼしへの保険として長めにする
+    GUILD_SETTINGS_TTL = 21600  # 6時間
     USER_SETTINGS_TTL = 3600  # 1時間
-    BOOST_COUNT_TTL = 1800  # 30分
+    BOOST_COUNT_TTL = 21600  # 6時間
     DICT_TTL = 7200  # 2時間
+    RECENT_DICT_TTL = 30  # VC未接続ギルドの辞書（ダッシュボード閲覧などの連続読み込み用）
 
     MAX_GUILD_SETTINGS = 50000
-    MAX_USER_SETTINGS = 100000
+    MAX_USER_SETTINGS = 10000  # 初回アクセス時に読み込むため、話しているユーザー分で足りる
     MAX_BOOST_COUNTS = 50000
     MAX_DICTIONARIES = 1000  # 辞書は大きいので少なめ
+    MAX_RECENT_DICTS = 256
 
     def __init__(self):
         # LRU + TTL キャッシュ
@@ -146,6 +159,12 @@ class SettingsCache:
             ttl_seconds=self.DICT_TTL
         )
 
+        # VC未接続ギルドの辞書（短時間だけ保持し、連続した再読み込みを吸収）
+        self.recent_dicts: LRUCache[dict] = LRUCache(
+            max_size=self.MAX_RECENT_DICTS,
+            ttl_seconds=self.RECENT_DICT_TTL
+        )
+
         # グローバル辞書（別管理、TTLなし）
         self._global_dict: Optional[dict] = None
         self._global_dict_id: int = 0
@@ -197,9 +216,15 @@ class SettingsCache:
     def set_guild_settings_sync(self, guild_id: int, settings: GuildSettings):
         self.guild_settings.set_sync(int(guild_id), settings)
 
+    def set_guild_settings_bulk_sync(self, settings: Dict[int, GuildSettings]):
+        self.guild_settings.set_many_sync(settings)
+
     async def invalidate_guild_settings(self, guild_id: int):
         await self.guild_settings.delete(int(guild_id))
 
+    def invalidate_guild_settings_sync(self, guild_id: int):
+        self.guild_settings.delete_sync(int(guild_id))
+
     # ========================================
     # ユーザー設定
     # ========================================
@@ -218,6 +243,9 @@ class SettingsCache:
     async def invalidate_user_setting(self, user_id: int):
         await self.user_settings.delete(int(user_id))
 
+    def invalidate_user_setting_sync(self, user_id: int):
+        self.user_settings.delete_sync(int(user_id))
+
     # ========================================
     # ブーストカウント
     # ========================================
@@ -233,10 +261,16 @@ class SettingsCache:
     def set_boost_count_sync(self, guild_id: int, count: int):
         self.boost_counts.set_sync(int(guild_id), count)
 
+    def set_boost_counts_bulk_sync(self, counts: Dict[int, int]):
+        self.boost_counts.set_many_sync(counts)
+
     async def invalidate_boost_count(self, guild_id: int):
         """ブーストカウントを無効化（次回アクセス時にDBから再取得）"""
         await self.boost_counts.delete(int(guild_id))
 
+    def invalidate_boost_count_sync(self, guild_id: int):
+        self.boost_counts.delete_sync(int(guild_id))
+
     # ========================================
     # 辞書（動的ロード）
     # ========================================
@@ -291,6 +325,27 @@ class SettingsCache:
         await self.dictionaries.delete(guild_id)
         logger.debug(f"[Cache] Dictionary invalidated: {guild_id}")
 
+    def invalidate_dict_sync(self, guild_id: int):
+        """同期版invalidate_dict"""
+        guild_id = int(guild_id)
+
+        if guild_id == self._global_dict_id:
+            self._global_dict = None
+            logger.debug(f"[Cache] Global dictionary invalidated")
+            return
+
+        self.dictionaries.delete_sync(guild_id)
+        logger.debug(f"[Cache] Dictionary invalidated: {guild_id}")
+
+    def get_recent_dict_sync(self, guild_id: int) -> Optional[dict]:
+        return self.recent_dicts.get_sync(int(guild_id))
+
+    def set_recent_dict_sync(self, guild_id: int, data: dict):
+        self.recent_dicts.set_sync(int(guild_id), data)
+
+    def invalidate_recent_dict_sync(self, guild_id: int):
+        self.recent_dicts.delete_sync(int(guild_id))
+
     async def remove_dict(self, guild_id: int):
         """辞書をRAMから削除（VC切断時）"""
         guild_id = int(guild_id)
@@ -340,6 +395,7 @@ class SettingsCache:
             "user_settings": len(self.user_settings),
             "boost_counts": len(self.boost_counts),
             "dictionaries_loaded": len(self.dictionaries),
+            "recent_dicts": len(self.recent_dicts),
             "global_dict_loaded": self._global_dict is not None,
             "active_voice_guilds": len(self._active_voice_guilds),
             "cache_version": self._cache_version,
@@ -351,6 +407,7 @@ class SettingsCache:
         await self.user_settings.clear()
         await self.boost_counts.clear()
         await self.dictionaries.clear()
+        await self.recent_dicts.clear()
         async with self._global_dict_lock:
             self._global_dict = None
         async with self._active_guilds_lock:
@@ -1,44 +1,173 @@
 # src/core/database.py
 
-import json
 import asyncio
 import asyncpg
+import hashlib
+import orjson
 import os
+import secrets
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
 from loguru import logger
 from src.core.models import GuildSettings
 from src.core.cache import SettingsCache
-from src.queries import UserSettingsQueries, DictQueries, GuildSettingsQueries, BillingQueries, VoiceSessionQueries
+from src.queries import (
+    UserSettingsQueries, DictQueries, GuildSettingsQueries, BillingQueries, VoiceSessionQueries, SchemaMetaQueries
+)
 
 
 class Database:
     # リスナー再接続設定
     LISTENER_RECONNECT_DELAY = 5  # 秒
-    LISTENER_HEALTH_CHECK_INTERVAL = 30  # 秒
+    # 切断は TCP keepalive と終了コールバックで検知するため、定期チェックは保険のみ
+    LISTENER_HEALTH_CHECK_INTERVAL = 300  # 秒
     MAX_RECONNECT_ATTEMPTS = 10
 
+    # 未設定ユーザーのデフォルト値（読み取り専用で共有し、ミスのたびに dict を作らない）
+    DEFAULT_USER_SETTING = MappingProxyType({"speaker": 1, "speed": 1.0, "pitch": 0.0})
+
+    # _setup_triggers で作成するトリガー
+    NOTIFY_TRIGGERS = (
+        'guild_settings_notify', 'guild_settings_delete_notify',
+        'dict_notify', 'dict_delete_notify',
+        'user_settings_notify', 'user_settings_delete_notify',
+        'guild_boosts_notify', 'guild_boosts_delete_notify',
+    )
+
+    # NOTIFY をまとめて処理する時間窓（同じキーへの連続更新は最新の1件だけ反映）
+    NOTIFICATION_DEBOUNCE_WINDOW = 0.05  # 秒
+    # 時間窓内にこれ以上溜まったら待たずに処理する（バースト時のメモリ上限）
+    MAX_PENDING_NOTIFICATIONS = 10000
+    # 反映済みの変更の WAL 位置を覚えておくキー数（Write-through と NOTIFY の前後関係が問題になるのは
+    # 書き込み直後だけなので、直近に変更されたキーの分で足りる）
+    MAX_TRACKED_WRITE_LSNS = 10000
+
+    # 1プールが使ってよい max_connections の割合（超えたら警告のみ）
+    POOL_MAX_CONNECTIONS_RATIO = 0.25
+
+    # 診断情報のスナップショットを使い回す時間（頻繁にスクレイプされても再計算しない）
+    DIAGNOSTICS_CACHE_TTL = 1.0  # 秒
+
     def __init__(self):
         self.pool: asyncpg.Pool | None = None
+        self._connect_lock = asyncio.Lock()
         self.cache = SettingsCache()
         self._listener_connection: asyncpg.Connection | None = None
         self._listener_task: asyncio.Task | None = None
+        self._reconnect_task: asyncio.Task | None = None
+
+        # 辞書のDB取得を同一ギルドで共有する（同時キャッシュミスで1往復にまとめる）
+        self._dict_inflight: dict[int, asyncio.Future] = {}
         self._shutdown = False
         self._listener_healthy = False
         self._reconnect_attempts = 0
-        self._last_notification_time: float = 0
-
-        # 通知処理用のロック（同時処理による競合防止）
-        self._notification_lock = asyncio.Lock()
+        # 最終受信時刻（経過時間の計測用の単調時計の値で、壁時計の時刻ではない）
+        self._last_notification_time: float | None = None
+        self._pending_notifications: list[str] = []
+        self._notification_flush_handle: asyncio.TimerHandle | None = None
+        # (テーブル名, ID) ごとに、キャッシュへ反映済みの変更の WAL 位置
+        self._applied_lsns: OrderedDict[tuple[str, int], int] = OrderedDict()
+        # (取得時刻, 診断情報) の直近スナップショット
+        self._diagnostics_cache: tuple[float, dict] | None = None
+
+        # 環境変数は起動時に1度だけ読み込む（再接続や判定のたびに参照しない）
+        # 接続パラメータは読み取り専用にし、実行中の設定のずれを防ぐ
+        self._pg_conn_kwargs = MappingProxyType({
+            "user": os.getenv("POSTGRES_USER"),
+            "password": os.getenv("POSTGRES_PASSWORD"),
+            "database": os.getenv("POSTGRES_DB"),
+            "host": os.getenv("POSTGRES_HOST"),
+            "port": os.getenv("POSTGRES_PORT"),
+        })
+        self._global_dict_id = int(os.getenv("GLOBAL_DICT_ID", "0"))
+        self._skip_premium = os.getenv("SKIP_PREMIUM_CHECK", "false").lower() == "true"
+        self._min_boost_level = int(os.getenv("MIN_BOOST_LEVEL", "0"))
+
+        # 設定・辞書・ブースト数はキャッシュから返すため、プールは
+        # コールドロードと書き込み用（コマンドごとに接続を使う前提ではない）
+        # リスナーが1接続を占有するため最大は2以上、最小は最大を超えないようにそろえる
+        self._pool_max_size = max(2, int(os.getenv("POSTGRES_POOL_MAX", "20")))
+        self._pool_min_size = min(int(os.getenv("POSTGRES_POOL_MIN", "5")), self._pool_max_size)
+        self._pool_idle_lifetime = float(os.getenv("POSTGRES_POOL_IDLE", "300"))
+        self._pool_max_queries = int(os.getenv("POSTGRES_POOL_MAX_QUERIES", "50000"))
+        self._command_timeout = float(os.getenv("POSTGRES_COMMAND_TIMEOUT", "10"))
+
+        # プール接続の application_name（pg_stat_activity でインスタンスごとの接続を見分ける）
+        # コンテナ間で PID が重複するため、ランダムな値を使う
+        self._application_name = f"sumirevoxbot:{secrets.token_hex(4)}"
+
+    # jsonb のバイナリ形式は先頭1バイトのバージョン番号に続いて JSON テキストが入る
+    JSONB_BINARY_VERSION = b'\x01'
+
+    @classmethod
+    def _encode_jsonb(cls, value) -> bytes:
+        """jsonb エンコーダー（str はシリアライズ済みの JSON としてそのまま送る）"""
+        if isinstance(value, str):
+            return cls.JSONB_BINARY_VERSION + value.encode()
+        return cls.JSONB_BINARY_VERSION + orjson.dumps(value)
+
+    @staticmethod
+    def _decode_jsonb(data: bytes):
+        """jsonb デコーダー（バージョン番号を読み飛ばし、コピーせずに解析）"""
+        return orjson.loads(memoryview(data)[1:])
+
+    async def _init_connection(self, conn: asyncpg.Connection):
+        """プール接続ごとの初期化（jsonb を dict のまま送受信できるようにする）"""
+        # バイナリ形式で受け渡し、orjson の bytes 出力を decode せずに送る
+        await conn.set_type_codec(
+            'jsonb',
+            encoder=self._encode_jsonb,
+            decoder=self._decode_jsonb,
+            schema='pg_catalog',
+            format='binary'
+        )
 
     async def connect(self):
-        if self.pool is None:
-            self.pool = await asyncpg.create_pool(
-                user=os.getenv("POSTGRES_USER"),
-                password=os.getenv("POSTGRES_PASSWORD"),
-                database=os.getenv("POSTGRES_DB"),
-                host=os.getenv("POSTGRES_HOST"),
-                port=os.getenv("POSTGRES_PORT"),
-                min_size=2,
-                max_size=10
+        # 同時に呼ばれてもプールを2つ作らない
+        async with self._connect_lock:
+            if self.pool is None:
+                self.pool = await asyncpg.create_pool(
+                    **self._pg_conn_kwargs,
+                    min_size=self._pool_min_size,
+                    max_size=self._pool_max_size,
+                    # アイドル接続は一定時間で閉じ、長寿命接続は一定クエリ数で作り直す
+                    max_inactive_connection_lifetime=self._pool_idle_lifetime,
+                    max_queries=self._pool_max_queries,
+                    # 発行するクエリは src.queries の定数で種類が決まっているため、接続ごとの
+                    # プリペアドステートメントを期限切れにしない（既定では5分ごとに Parse し直す）
+                    max_cached_statement_lifetime=0,
+                    # 詰まったクエリがプールを占有し続けないようにする
+                    command_timeout=self._command_timeout,
+                    # リスナー接続もプールから借りるため、切断検知の keepalive はプール全体に設定
+                    # 単純なクエリしか発行しないため JIT コンパイルも無効にする
+                    # synchronous_commit はサーバーの既定のまま（非同期コミットは設定・辞書の
+                    # Write-through 用クエリの中で、その文のトランザクションにだけ指定する）
+                    server_settings={
+                        'application_name': self._application_name,
+                        'jit': 'off',
+                        'tcp_keepalives_idle': '30',
+                        'tcp_keepalives_interval': '10',
+                        'tcp_keepalives_count': '3',
+                    },
+                    init=self._init_connection
+                )
+                await self._check_pool_size()
+
+    async def _check_pool_size(self):
+        """プールの最大接続数がサーバーの max_connections に対して大きすぎないか確認"""
+        try:
+            max_connections = int(await self.pool.fetchval("SHOW max_connections"))
+        except Exception as e:
+            logger.debug(f"Could not read max_connections: {e}")
+            return
+
+        # 複数インスタンスで同じDBを共有するため、1プールあたり 25% を目安にする
+        if self._pool_max_size > max_connections * self.POOL_MAX_CONNECTIONS_RATIO:
+            logger.warning(
+                f"POSTGRES_POOL_MAX={self._pool_max_size} exceeds "
+                f"{int(self.POOL_MAX_CONNECTIONS_RATIO * 100)}% of max_connections={max_connections}"
             )
 
     async def init_db(self):
@@ -46,22 +175,32 @@ class Database:
             await self.connect()
 
         async with self.pool.acquire() as conn:
-            # テーブル作成
-            await conn.execute(UserSettingsQueries.CREATE_TABLE)
-            await conn.execute(DictQueries.CREATE_TABLE)
-            await conn.execute(GuildSettingsQueries.CREATE_TABLE)
-            await conn.execute(BillingQueries.CREATE_USERS_TABLE)
-            await conn.execute(BillingQueries.CREATE_BOOSTS_TABLE)
-            await conn.execute(BillingQueries.CREATE_BOOSTS_GUILD_INDEX)
-            await conn.execute(BillingQueries.CREATE_BOOSTS_USER_INDEX)
-            await conn.execute(VoiceSessionQueries.CREATE_TABLE)
-            await conn.execute(VoiceSessionQueries.CREATE_BOT_INDEX)
+            # テーブル作成（引数なしの execute は複数文を1往復で送れる）
+            await conn.execute(";\n".join((
+                UserSettingsQueries.CREATE_TABLE,
+                UserSettingsQueries.SET_COLUMNS_NOT_NULL,
+                UserSettingsQueries.SET_FILLFACTOR,
+                DictQueries.CREATE_TABLE,
+                DictQueries.SET_FILLFACTOR,
+                GuildSettingsQueries.CREATE_TABLE,
+                GuildSettingsQueries.SET_FILLFACTOR,
+                BillingQueries.CREATE_USERS_TABLE,
+                BillingQueries.CREATE_BOOSTS_TABLE,
+                BillingQueries.CREATE_BOOSTS_GUILD_INDEX,
+                BillingQueries.DROP_LEGACY_BOOSTS_GUILD_INDEX,
+                BillingQueries.CREATE_BOOSTS_USER_INDEX,
+                VoiceSessionQueries.CREATE_TABLE,
+                VoiceSessionQueries.SET_TABLE_UNLOGGED,
+                VoiceSessionQueries.SET_FILLFACTOR,
+                VoiceSessionQueries.CREATE_BOT_INDEX,
+                SchemaMetaQueries.CREATE_TABLE,
+            )))
 
             # トリガー作成
             await self._setup_triggers(conn)
 
         # グローバル辞書IDを設定
-        self.cache.global_dict_id = int(os.getenv("GLOBAL_DICT_ID", "0"))
+        self.cache.global_dict_id = self._global_dict_id
 
         # 起動時データロード
         await self._load_initial_data()
@@ -80,7 +219,9 @@ class Database:
                       DECLARE
                           record_id   BIGINT;
                           record_data JSONB;
-                          boost_count INTEGER;
+                          payload     TEXT;
+                          -- 書き込んだ行の WAL 位置（Write-through と書き込み順を比べる）
+                          write_lsn   BIGINT := pg_current_wal_insert_lsn() - '0/0';
                       BEGIN
                           CASE TG_TABLE_NAME
                               WHEN 'guild_settings' THEN 
@@ -96,26 +237,32 @@ class Database:
                                       'speed', NEW.speed,
                                       'pitch', NEW.pitch
                                   );
-                              WHEN 'guild_boosts' THEN 
-                                  record_id := NEW.guild_id;
-                                  -- ブーストカウントは絶対値を送信
-                                  SELECT COUNT(*) INTO boost_count 
-                                  FROM guild_boosts WHERE guild_id = NEW.guild_id;
-                                  record_data := json_build_object('count', boost_count);
                               ELSE 
                                   record_id := NULL;
                                   record_data := NULL;
                           END CASE;
 
-                          PERFORM pg_notify(
-                              'settings_change',
-                              json_build_object(
+                          payload := json_build_object(
+                              'table', TG_TABLE_NAME,
+                              'operation', TG_OP,
+                              'id', record_id,
+                              'lsn', write_lsn,
+                              'data', record_data
+                          )::text;
+
+                          -- NOTIFY のペイロード上限（8000バイト）を超える場合はデータを省く
+                          -- （受信側はキャッシュを無効化し、次回アクセス時に DB から取得する）
+                          IF octet_length(payload) > 7900 THEN
+                              payload := json_build_object(
                                   'table', TG_TABLE_NAME,
                                   'operation', TG_OP,
                                   'id', record_id,
-                                  'data', record_data
-                              )::text
-                          );
+                                  'lsn', write_lsn,
+                                      'data', NULL
+                              )::text;
+                          END IF;
+
+                          PERFORM pg_notify('settings_change', payload);
                           RETURN NEW;
                       END;
 
@@ -129,7 +276,6 @@ class Database:
                       DECLARE
                           record_id BIGINT;
                           record_data JSONB;
-                          boost_count INTEGER;
                       BEGIN
                           CASE TG_TABLE_NAME
                               WHEN 'guild_settings' THEN 
@@ -141,12 +287,6 @@ class Database:
                               WHEN 'user_settings' THEN 
                                   record_id := OLD.user_id;
                                   record_data := NULL;
-                              WHEN 'guild_boosts' THEN 
-                                  record_id := OLD.guild_id;
-                                  -- 削除後のブーストカウント（絶対値）
-                                  SELECT COUNT(*) INTO boost_count 
-                                  FROM guild_boosts WHERE guild_id = OLD.guild_id;
-                                  record_data := json_build_object('count', boost_count);
                               ELSE 
                                   record_id := NULL;
                                   record_data := NULL;
@@ -158,7 +298,8 @@ class Database:
                                   'table', TG_TABLE_NAME,
                                   'operation', 'DELETE',
                                   'id', record_id,
-                                  'data', record_data
+                                  'lsn', pg_current_wal_insert_lsn() - '0/0',
+                                      'data', record_data
                               )::text
                           );
                           RETURN OLD;
@@ -166,6 +307,41 @@ class Database:
 
                       $$ LANGUAGE plpgsql;
 
+                      -- 通知用の関数（guild_boosts: ステートメント単位でギルドごとに1回だけ通知）
+                      CREATE OR REPLACE FUNCTION notify_boosts_change()
+                          RETURNS TRIGGER AS
+
+                      $$
+                      DECLARE
+                          guild_ids BIGINT[];
+                          target_id BIGINT;
+                      BEGIN
+                          IF TG_OP = 'INSERT' THEN
+                              SELECT array_agg(DISTINCT guild_id) INTO guild_ids FROM new_rows;
+                          ELSE
+                              SELECT array_agg(DISTINCT guild_id) INTO guild_ids FROM old_rows;
+                          END IF;
+
+                          FOR target_id IN SELECT unnest(guild_ids) LOOP
+                              -- ブーストカウントは絶対値を送信
+                              PERFORM pg_notify(
+                                  'settings_change',
+                                  json_build_object(
+                                      'table', TG_TABLE_NAME,
+                                      'operation', TG_OP,
+                                      'id', target_id,
+                                      'lsn', pg_current_wal_insert_lsn() - '0/0',
+                                      'data', json_build_object(
+                                          'count', (SELECT COUNT(*) FROM guild_boosts WHERE guild_id = target_id)
+                                      )
+                                  )::text
+                              );
+                          END LOOP;
+                          RETURN NULL;
+                      END;
+
+                      $$ LANGUAGE plpgsql;
+
                       -- guild_settings トリガー
                       DROP TRIGGER IF EXISTS guild_settings_notify ON guild_settings;
                       CREATE TRIGGER guild_settings_notify
@@ -205,87 +381,157 @@ class Database:
                           FOR EACH ROW
                           EXECUTE FUNCTION notify_settings_delete();
 
-                      -- guild_boosts トリガー
+                      -- guild_boosts トリガー（一括 INSERT/DELETE でも通知はギルドごとに1回）
                       DROP TRIGGER IF EXISTS guild_boosts_notify ON guild_boosts;
                       CREATE TRIGGER guild_boosts_notify
                           AFTER INSERT ON guild_boosts
-                          FOR EACH ROW
-                          EXECUTE FUNCTION notify_settings_change();
+                          REFERENCING NEW TABLE AS new_rows
+                          FOR EACH STATEMENT
+                          EXECUTE FUNCTION notify_boosts_change();
 
                       DROP TRIGGER IF EXISTS guild_boosts_delete_notify ON guild_boosts;
                       CREATE TRIGGER guild_boosts_delete_notify
                           AFTER DELETE ON guild_boosts
-                          FOR EACH ROW
-                          EXECUTE FUNCTION notify_settings_delete();
+                          REFERENCING OLD TABLE AS old_rows
+                          FOR EACH STATEMENT
+                          EXECUTE FUNCTION notify_boosts_change();
                       """
-        await conn.execute(trigger_sql)
+        # 定義が変わっておらず、トリガーも揃っていれば作り直さない（カタログロックと WAL を避ける）
+        # 通常の起動では揃っているため、まずロックもトランザクションも使わず1往復で確認する
+        signature = hashlib.sha256(trigger_sql.encode()).hexdigest()
+        check_args = ('triggers_sig', signature, list(self.NOTIFY_TRIGGERS))
+        if await conn.fetchval(SchemaMetaQueries.TRIGGERS_UP_TO_DATE, *check_args):
+            logger.info("Database triggers up to date")
+            return
+
+        async with conn.transaction():
+            await conn.execute(SchemaMetaQueries.LOCK_TRIGGER_SETUP)
+
+            # ロックを待つ間に他のインスタンスが作り直した場合は何もしない
+            if await conn.fetchval(SchemaMetaQueries.TRIGGERS_UP_TO_DATE, *check_args):
+                logger.info("Database triggers up to date")
+                return
+
+            await conn.execute(trigger_sql)
+            await conn.execute(SchemaMetaQueries.SET_VALUE, 'triggers_sig', signature)
+
         logger.info("Database triggers initialized")
 
     async def _load_initial_data(self):
         """起動時に必要なデータをキャッシュにロード"""
         logger.info("Loading initial data to cache...")
 
-        async with self.pool.acquire() as conn:
-            # ギルド設定（全件）
-            rows = await conn.fetch("SELECT guild_id, settings FROM guild_settings")
-            for row in rows:
-                guild_id = int(row['guild_id'])
-                try:
-                    raw_data = row['settings']
-                    if isinstance(raw_data, str):
-                        raw_data = json.loads(raw_data)
-                    settings = GuildSettings.model_validate(raw_data)
-                    self.cache.set_guild_settings_sync(guild_id, settings)
-                except Exception as e:
-                    logger.error(f"Failed to load guild settings {guild_id}: {e}")
-
-            # ユーザー設定（全件）
-            rows = await conn.fetch("SELECT user_id, speaker, speed, pitch FROM user_settings")
-            for row in rows:
-                self.cache.set_user_setting_sync(int(row['user_id']), {
-                    "speaker": row['speaker'],
-                    "speed": row['speed'],
-                    "pitch": row['pitch']
-                })
-
-            # ブーストカウント（ブーストがあるギルドのみ）
-            rows = await conn.fetch(
-                "SELECT guild_id, COUNT(*) as count FROM guild_boosts GROUP BY guild_id"
-            )
-            for row in rows:
-                self.cache.set_boost_count_sync(int(row['guild_id']), row['count'])
-
-            # グローバル辞書のみロード
-            if self.cache.global_dict_id and self.cache.global_dict_id != 0:
-                row = await conn.fetchrow(DictQueries.GET_DICT, self.cache.global_dict_id)
-                if row:
-                    raw_data = row['dict']
-                    if isinstance(raw_data, str):
-                        raw_data = json.loads(raw_data)
-                    self.cache.set_dict_sync(self.cache.global_dict_id, raw_data)
-                    logger.info(f"Global dictionary loaded: {len(raw_data)} entries")
+        # ユーザー設定は全件ロードせず、初回アクセス時に get_user_setting で読み込む
+        # 3種類のデータは独立しているので、別々の接続で並行して取得する（1往復分の待ち時間で済む）
+        await asyncio.gather(
+            self._load_all_guild_settings(),
+            self._load_all_boost_counts(),
+            self._load_global_dict(),
+        )
 
         self.cache.mark_initialized()
         stats = self.cache.stats()
         logger.success(
             f"Cache initialized: {stats['guild_settings']} guilds, "
-            f"{stats['user_settings']} users, {stats['boost_counts']} boost records"
+            f"{stats['boost_counts']} boost records"
         )
 
+    async def _load_all_guild_settings(self):
+        """ギルド設定（全件）をキャッシュにロード"""
+        async with self.pool.acquire() as conn:
+            # カーソルで受信しながら処理する（JSONB で行が大きいため1回の取得は控えめ）
+            # settings はテキストで受け取り、pydantic に解析と検証を1回でさせる
+            async with conn.transaction():
+                cursor = await conn.cursor(GuildSettingsQueries.GET_ALL_SETTINGS_TEXT)
+                while rows := await cursor.fetch(500):
+                    batch = {}
+                    for row in rows:
+                        guild_id = int(row['guild_id'])
+                        try:
+                            batch[guild_id] = GuildSettings.model_validate_json(row['settings'])
+                        except Exception as e:
+                            logger.error(f"Failed to load guild settings {guild_id}: {e}")
+                    self.cache.set_guild_settings_bulk_sync(batch)
+
+    async def _load_all_boost_counts(self):
+        """ブーストカウント（ブーストがあるギルドのみ）をキャッシュにロード"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                cursor = await conn.cursor(BillingQueries.GET_ALL_GUILD_BOOST_COUNTS)
+                while rows := await cursor.fetch(2000):
+                    self.cache.set_boost_counts_bulk_sync(
+                        {int(row['guild_id']): row['count'] for row in rows}
+                    )
+
+    async def _load_global_dict(self):
+        """グローバル辞書のみロード"""
+        if not self.cache.global_dict_id:
+            return
+
+        row = await self.pool.fetchrow(DictQueries.GET_DICT, self.cache.global_dict_id)
+        if row:
+            raw_data = row['dict']
+            self.cache.set_dict_sync(self.cache.global_dict_id, raw_data)
+            logger.info(f"Global dictionary loaded: {len(raw_data)} entries")
+
     # ========================================
     # LISTEN/NOTIFY
     # ========================================
+    async def _connect_listener(self):
+        """プールから接続を1つ借りたままにし、NOTIFY と切断のコールバックを登録"""
+        # 専用接続を別に張らず、プールの1枠をリスナーに固定する（バックエンドを1つ節約）
+        connection = await self.pool.acquire(timeout=10)
+        try:
+            await connection.add_listener('settings_change', self._on_notification)
+            connection.add_termination_listener(self._on_listener_terminated)
+        except Exception:
+            await self.pool.release(connection)
+            raise
+        self._listener_connection = connection
+
+    async def _release_listener_connection(self):
+        """リスナー接続をプールへ返却"""
+        connected = self._is_listener_connected()
+        connection = self._listener_connection
+        self._listener_connection = None
+        if not connected:
+            return
+        try:
+            try:
+                connection.remove_termination_listener(self._on_listener_terminated)
+                await connection.remove_listener('settings_change', self._on_notification)
+            finally:
+                await self.pool.release(connection)
+        except Exception as e:
+            logger.warning(f"Error releasing listener connection: {e}")
+
+    def _is_listener_connected(self) -> bool:
+        """リスナー接続が生きているか（切断された接続はプールが回収し、以降は操作できない。asyncpg 0.32 以降）"""
+        if self._listener_connection is None:
+            return False
+        try:
+            return not self._listener_connection.is_closed()
+        except asyncpg.InterfaceError:
+            return False
+
+    def _on_listener_terminated(self, connection):
+        """リスナー接続が切断された時のコールバック（即座に再接続をスケジュール）"""
+        # 終了処理中や、再接続で置き換えた古い接続の切断は無視
+        if self._shutdown or connection is not self._listener_connection:
+            return
+        logger.warning("Listener connection terminated, reconnecting...")
+        self._listener_healthy = False
+        self._schedule_listener_reconnect()
+
+    def _schedule_listener_reconnect(self) -> asyncio.Task:
+        """再接続タスクを1つだけ起動（実行中なら既存のタスクを返す）"""
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._reconnect_listener())
+        return self._reconnect_task
+
     async def _start_listener(self):
         """LISTEN/NOTIFY のリスナーを開始"""
-        self._listener_connection = await asyncpg.connect(
-            user=os.getenv("POSTGRES_USER"),
-            password=os.getenv("POSTGRES_PASSWORD"),
-            database=os.getenv("POSTGRES_DB"),
-            host=os.getenv("POSTGRES_HOST"),
-            port=os.getenv("POSTGRES_PORT")
-        )
-
-        await self._listener_connection.add_listener('settings_change', self._on_notification)
+        await self._connect_listener()
         self._listener_healthy = True
         self._reconnect_attempts = 0
         logger.info("Started listening for database notifications")
@@ -302,10 +548,10 @@ class Database:
                     break
 
                 # 接続状態をチェック
-                if self._listener_connection is None or self._listener_connection.is_closed():
+                if not self._is_listener_connected():
                     logger.warning("Listener connection lost, reconnecting...")
                     self._listener_healthy = False
-                    await self._reconnect_listener()
+                    await self._schedule_listener_reconnect()
 
             except asyncio.CancelledError:
                 logger.debug("Listener keep-alive task cancelled")
@@ -321,23 +567,11 @@ class Database:
                 self._reconnect_attempts += 1
                 logger.info(f"Reconnection attempt {self._reconnect_attempts}/{self.MAX_RECONNECT_ATTEMPTS}")
 
-                # 古い接続をクリーンアップ
-                if self._listener_connection and not self._listener_connection.is_closed():
-                    try:
-                        await self._listener_connection.close()
-                    except Exception as e:
-                        logger.warning(f"Error closing old listener connection: {e}")
+                # 古い接続をプールへ返却
+                await self._release_listener_connection()
 
                 # 新しい接続を確立
-                self._listener_connection = await asyncpg.connect(
-                    user=os.getenv("POSTGRES_USER"),
-                    password=os.getenv("POSTGRES_PASSWORD"),
-                    database=os.getenv("POSTGRES_DB"),
-                    host=os.getenv("POSTGRES_HOST"),
-                    port=os.getenv("POSTGRES_PORT")
-                )
-
-                await self._listener_connection.add_listener('settings_change', self._on_notification)
+                await self._connect_listener()
 
                 # 再接続後にキャッシュを再同期
                 await self._resync_cache_after_reconnect()
@@ -361,56 +595,98 @@ class Database:
         # キャッシュバージョンをインクリメント
         self.cache.increment_cache_version()
 
-        async with self.pool.acquire() as conn:
-            # アクティブなVC接続中のギルドの辞書を再ロード
-            active_guilds = self.cache.get_active_guilds()
-            for guild_id in active_guilds:
-                try:
-                    row = await conn.fetchrow(DictQueries.GET_DICT, guild_id)
-                    if row:
-                        raw_data = row['dict']
-                        if isinstance(raw_data, str):
-                            raw_data = json.loads(raw_data)
-                        await self.cache.set_dict(guild_id, raw_data)
-                    else:
-                        await self.cache.set_dict(guild_id, {})
-                except Exception as e:
-                    logger.error(f"Failed to resync dictionary for guild {guild_id}: {e}")
-
-            # グローバル辞書を再ロード
-            if self.cache.global_dict_id and self.cache.global_dict_id != 0:
-                row = await conn.fetchrow(DictQueries.GET_DICT, self.cache.global_dict_id)
-                if row:
-                    raw_data = row['dict']
-                    if isinstance(raw_data, str):
-                        raw_data = json.loads(raw_data)
-                    await self.cache.set_dict(self.cache.global_dict_id, raw_data)
-
-            # ブーストカウントを再ロード（頻繁に変わる可能性があるため）
-            rows = await conn.fetch(
-                "SELECT guild_id, COUNT(*) as count FROM guild_boosts GROUP BY guild_id"
-            )
-            for row in rows:
-                await self.cache.set_boost_count(int(row['guild_id']), row['count'])
+        # 切断中の変更は通知されないため、削除された行が残らないよう一度空にしてから読み直す
+        # （ユーザー設定は初回アクセス時に読み込むので空にするだけ）
+        await asyncio.gather(
+            self.cache.guild_settings.clear(),
+            self.cache.user_settings.clear(),
+            self.cache.boost_counts.clear(),
+        )
+
+        # それぞれ独立しているので、別々の接続で並行して再ロードする
+        await asyncio.gather(
+            self._resync_dicts(),
+            self._load_all_guild_settings(),
+            self._load_all_boost_counts(),
+        )
 
         logger.info("Cache resync completed")
 
+    async def _resync_dicts(self):
+        """アクティブなVC接続中のギルドとグローバル辞書を1回のクエリで再ロード"""
+        active_guilds = self.cache.get_active_guilds()
+        global_dict_id = self.cache.global_dict_id
+        target_ids = set(active_guilds)
+        if global_dict_id:
+            target_ids.add(global_dict_id)
+
+        try:
+            rows = await self.pool.fetch(DictQueries.GET_DICTS_BULK, list(target_ids))
+        except Exception as e:
+            logger.error(f"Failed to resync dictionaries: {e}")
+            return
+
+        present = {int(row['guild_id']): row['dict'] for row in rows}
+
+        for guild_id in active_guilds:
+            await self.cache.set_dict(guild_id, present.get(guild_id, {}))
+
+        # グローバル辞書は行がある場合のみ更新
+        if global_dict_id and global_dict_id in present:
+            await self.cache.set_dict(global_dict_id, present[global_dict_id])
+
     def _on_notification(self, connection, pid, channel, payload):
-        """通知を受け取った時のコールバック（非同期処理をスケジュール）"""
-        asyncio.create_task(self._handle_notification_safe(payload))
+        """通知を受け取った時のコールバック（一定時間バッファしてからまとめて処理）"""
+        self._last_notification_time = time.monotonic()
+        self._pending_notifications.append(payload)
+
+        # 通知は無効化の合図なので捨てずに、上限に達したら即座に処理する
+        if len(self._pending_notifications) >= self.MAX_PENDING_NOTIFICATIONS:
+            if self._notification_flush_handle is not None:
+                self._notification_flush_handle.cancel()
+            self._flush_notifications()
+            return
 
-    async def _handle_notification_safe(self, payload: str):
-        """通知を安全に処理（ロック付き）"""
-        async with self._notification_lock:
-            await self._handle_notification(payload)
+        if self._notification_flush_handle is None:
+            self._notification_flush_handle = asyncio.get_running_loop().call_later(
+                self.NOTIFICATION_DEBOUNCE_WINDOW, self._flush_notifications
+            )
 
-    async def _handle_notification(self, payload: str):
-        """通知を処理"""
+    def _flush_notifications(self):
+        """バッファした通知を (table, id) ごとに最新の1件だけ処理"""
+        self._notification_flush_handle = None
+        payloads, self._pending_notifications = self._pending_notifications, []
+
+        latest: dict[tuple, dict] = {}
+        for payload in payloads:
+            data = self._parse_notification(payload)
+            if data is None:
+                continue
+            key = (data.get('table'), data.get('id'))
+            # 最後に届いた順で処理するため、既存のキーは末尾に移動
+            latest.pop(key, None)
+            latest[key] = data
+
+        if len(latest) < len(payloads):
+            logger.debug(f"[NOTIFY] Coalesced {len(payloads)} notifications into {len(latest)}")
+
+        for data in latest.values():
+            self._dispatch_notification(data)
+
+    def _parse_notification(self, payload: str) -> dict | None:
+        """通知のペイロードを解析（不正な場合は None）"""
         try:
-            import time
-            self._last_notification_time = time.time()
+            data = orjson.loads(payload)
+            if not isinstance(data, dict):
+                raise ValueError(f"unexpected payload: {payload!r}")
+            return data
+        except Exception as e:
+            logger.error(f"Failed to process notification: {e}")
+            return None
 
-            data = json.loads(payload)
+    def _dispatch_notification(self, data: dict):
+        """解析済みの通知をテーブルごとのハンドラに振り分け"""
+        try:
             table = data.get('table')
             operation = data.get('operation')
             record_id = data.get('id')
@@ -419,121 +695,205 @@ class Database:
             if record_id is not None:
                 record_id = int(record_id)
 
+            # 自分の書き込みの通知も反映するが、既に反映した変更より古ければ捨てる
+            lsn = data.get('lsn')
+            if not self._accept_change(table, record_id, None if lsn is None else int(lsn)):
+                logger.debug(f"[NOTIFY] Skipped stale {operation} on {table}, id={record_id}")
+                return
+
             logger.debug(f"[NOTIFY] {operation} on {table}, id={record_id}")
 
             if table == 'guild_settings':
-                await self._handle_guild_settings_change(operation, record_id, record_data)
+                self._handle_guild_settings_change(operation, record_id, record_data)
             elif table == 'dict':
-                await self._handle_dict_change(operation, record_id)
+                self._handle_dict_change(operation, record_id)
             elif table == 'user_settings':
-                await self._handle_user_settings_change(operation, record_id, record_data)
+                self._handle_user_settings_change(operation, record_id, record_data)
             elif table == 'guild_boosts':
-                await self._handle_boost_change(operation, record_id, record_data)
+                self._handle_boost_change(operation, record_id, record_data)
 
         except Exception as e:
             logger.error(f"Failed to process notification: {e}")
 
-    async def _handle_guild_settings_change(self, operation: str, guild_id: int, data):
-        if operation == 'DELETE':
-            await self.cache.invalidate_guild_settings(guild_id)
+    def _accept_change(self, table: str, record_id: int, lsn: int | None) -> bool:
+        """
+        変更をキャッシュへ反映してよいか判定し、反映する場合はその WAL 位置を記録
+
+        Write-through の書き込みと NOTIFY は、どちらも書き込んだ行の WAL 位置（lsn）を持つ。
+        同じ行への後の書き込みは行ロックで前の書き込みのコミットを待つため、lsn はコミット順に
+        大きくなる。反映済みの変更より小さい lsn は古い変更として捨て、NOTIFY の後に遅れて
+        走った Write-through でキャッシュが巻き戻らないようにする（lsn が無ければ常に反映）。
+        """
+        if lsn is None:
+            return True
+        key = (table, record_id)
+        applied = self._applied_lsns.get(key)
+        if applied is not None and lsn < applied:
+            return False
+        self._applied_lsns[key] = lsn
+        self._applied_lsns.move_to_end(key)
+        if len(self._applied_lsns) > self.MAX_TRACKED_WRITE_LSNS:
+            self._applied_lsns.popitem(last=False)
+        return True
+
+    def _handle_guild_settings_change(self, operation: str, guild_id: int, data):
+        # データが省かれた通知（ペイロード上限超過）も無効化して DB から再取得させる
+        if operation == 'DELETE' or data is None:
+            self.cache.invalidate_guild_settings_sync(guild_id)
         else:
             try:
-                if isinstance(data, str):
-                    data = json.loads(data)
+                # SQL で直接書き換えた行や他のサービスの書き込みも届くため、読み込み時と同じく検証する
                 settings = GuildSettings.model_validate(data)
-                await self.cache.set_guild_settings(guild_id, settings)
+                self.cache.set_guild_settings_sync(guild_id, settings)
                 logger.debug(f"[Cache] Guild settings updated via NOTIFY: {guild_id}")
             except Exception as e:
                 logger.error(f"Failed to update guild settings cache: {e}")
                 # 失敗時はキャッシュを無効化してDBフォールバックを強制
-                await self.cache.invalidate_guild_settings(guild_id)
+                self.cache.invalidate_guild_settings_sync(guild_id)
 
-    async def _handle_dict_change(self, operation: str, guild_id: int):
+    def _handle_dict_change(self, operation: str, guild_id: int):
         """辞書変更の処理（即座に無効化し、必要時に再取得）"""
-        # グローバル辞書は即座に再ロード
+        # グローバル辞書は即座に再ロード（DB I/O が必要なのはここだけ）
         if guild_id == self.cache.global_dict_id:
             if operation == 'DELETE':
-                await self.cache.set_dict(guild_id, {})
+                self.cache.set_dict_sync(guild_id, {})
             else:
-                await self._reload_dict(guild_id)
+                asyncio.create_task(self._reload_dict(guild_id))
             return
 
         # 通常の辞書は無効化のみ（次回アクセス時に再取得）
         if self.cache.is_guild_active(guild_id):
-            await self.cache.invalidate_dict(guild_id)
+            self.cache.invalidate_dict_sync(guild_id)
             logger.debug(f"[Cache] Dictionary invalidated via NOTIFY: {guild_id}")
+        else:
+            self.cache.invalidate_recent_dict_sync(guild_id)
+
+    async def _fetch_dict(self, guild_id: int, fresh: bool = False) -> dict | None:
+        """
+        辞書を DB から取得（行が無ければ None）
+
+        同じギルドの取得が進行中ならその結果を共有する。
+        fresh=True の場合は進行中の取得（変更前に始まった可能性がある）には相乗りせず、
+        新しく取得したものを以降の呼び出しと共有する。
+        """
+        if not fresh:
+            inflight = self._dict_inflight.get(guild_id)
+            if inflight is not None:
+                return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._dict_inflight[guild_id] = future
+        try:
+            row = await self.pool.fetchrow(DictQueries.GET_DICT, guild_id)
+            raw_data = None
+            if row:
+                raw_data = row['dict']
+            future.set_result(raw_data)
+            return raw_data
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 待機者がいなくても "exception was never retrieved" を出さない
+            future.exception()
+            raise
+        finally:
+            if self._dict_inflight.get(guild_id) is future:
+                del self._dict_inflight[guild_id]
 
     async def _reload_dict(self, guild_id: int):
         """辞書を DB から再取得してキャッシュに格納"""
         try:
-            async with self.pool.acquire() as conn:
-                row = await conn.fetchrow(DictQueries.GET_DICT, guild_id)
-                if row:
-                    raw_data = row['dict']
-                    if isinstance(raw_data, str):
-                        raw_data = json.loads(raw_data)
-                    await self.cache.set_dict(guild_id, raw_data)
-                    logger.debug(f"[Cache] Dictionary reloaded: {guild_id} ({len(raw_data)} entries)")
-                else:
-                    await self.cache.set_dict(guild_id, {})
+            raw_data = await self._fetch_dict(guild_id, fresh=True)
+            if raw_data is not None:
+                await self.cache.set_dict(guild_id, raw_data)
+                logger.debug(f"[Cache] Dictionary reloaded: {guild_id} ({len(raw_data)} entries)")
+            else:
+                await self.cache.set_dict(guild_id, {})
         except Exception as e:
             logger.error(f"Failed to reload dictionary for guild {guild_id}: {e}")
 
-    async def _handle_user_settings_change(self, operation: str, user_id: int, data):
-        if operation == 'DELETE':
-            await self.cache.invalidate_user_setting(user_id)
+    def _handle_user_settings_change(self, operation: str, user_id: int, data):
+        if operation == 'DELETE' or data is None:
+            self.cache.invalidate_user_setting_sync(user_id)
         else:
             try:
-                if isinstance(data, str):
-                    data = json.loads(data)
-                await self.cache.set_user_setting(user_id, data)
+                self.cache.set_user_setting_sync(user_id, data)
                 logger.debug(f"[Cache] User settings updated via NOTIFY: {user_id}")
             except Exception as e:
                 logger.error(f"Failed to update user settings cache: {e}")
-                await self.cache.invalidate_user_setting(user_id)
+                self.cache.invalidate_user_setting_sync(user_id)
 
-    async def _handle_boost_change(self, operation: str, guild_id: int, data):
+    def _handle_boost_change(self, operation: str, guild_id: int, data):
         """ブースト変更の処理（絶対値で更新）"""
         try:
             if data and isinstance(data, dict) and 'count' in data:
                 count = int(data['count'])
-                await self.cache.set_boost_count(guild_id, count)
+                self.cache.set_boost_count_sync(guild_id, count)
                 logger.debug(f"[Cache] Boost count set to {count} via NOTIFY: {guild_id}")
             else:
                 # データがない場合は無効化してDBから再取得させる
-                await self.cache.invalidate_boost_count(guild_id)
+                self.cache.invalidate_boost_count_sync(guild_id)
                 logger.debug(f"[Cache] Boost count invalidated via NOTIFY: {guild_id}")
         except Exception as e:
             logger.error(f"Failed to update boost count cache: {e}")
-            await self.cache.invalidate_boost_count(guild_id)
+            self.cache.invalidate_boost_count_sync(guild_id)
 
     # ========================================
     # 辞書の動的ロード/アンロード
     # ========================================
     async def load_guild_dict(self, guild_id: int):
         """VC接続時に辞書をロード"""
-        guild_id = int(guild_id)
         await self.cache.add_active_guild(guild_id)
+        # 接続中の変更は通常のキャッシュにだけ反映されるため、短時間キャッシュは破棄
+        # （残っていた値は NOTIFY で最新に保たれているので、そのままロード済みの辞書にする）
+        recent = self.cache.get_recent_dict_sync(guild_id)
+        self.cache.invalidate_recent_dict_sync(guild_id)
 
         # 既にロード済みならスキップ
         if self.cache.is_dict_loaded(guild_id):
             return
 
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(DictQueries.GET_DICT, guild_id)
-            if row:
-                raw_data = row['dict']
-                if isinstance(raw_data, str):
-                    raw_data = json.loads(raw_data)
-                await self.cache.set_dict(guild_id, raw_data)
-            else:
-                await self.cache.set_dict(guild_id, {})
+        if recent is not None:
+            self.cache.set_dict_sync(guild_id, recent)
+            logger.info(f"[{guild_id}] Dictionary loaded for voice session")
+            return
+
+        global_dict_id = self.cache.global_dict_id
+        if global_dict_id and not self.cache.is_dict_loaded(global_dict_id):
+            # グローバル辞書も未ロードなら同じクエリで取得する（最初のメッセージで2往復させない）
+            rows = await self.pool.fetch(DictQueries.GET_DICTS_BULK, [guild_id, global_dict_id])
+            present = {int(row['guild_id']): row['dict'] for row in rows}
+            raw_data = present.get(guild_id)
+            await self.cache.set_dict(global_dict_id, present.get(global_dict_id, {}))
+        else:
+            raw_data = await self._fetch_dict(guild_id)
+        await self.cache.set_dict(guild_id, raw_data if raw_data is not None else {})
 
         logger.info(f"[{guild_id}] Dictionary loaded for voice session")
 
+    async def prefetch_guild_dicts(self, guild_ids: list[int]):
+        """
+        VC 接続を復元するギルドの辞書を1回のクエリでロード
+
+        復元は1ギルドずつ接続するため、短時間キャッシュではなく接続中の辞書として保持する
+        （NOTIFY で無効化されるよう接続中として扱う。接続できなかったギルドは unload_guild_dict で外す）。
+        """
+        for guild_id in guild_ids:
+            await self.cache.add_active_guild(guild_id)
+
+        targets = [guild_id for guild_id in guild_ids if not self.cache.is_dict_loaded(guild_id)]
+        if not targets:
+            return
+
+        rows = await self.pool.fetch(DictQueries.GET_DICTS_BULK, targets)
+        present = {int(row['guild_id']): row['dict'] for row in rows}
+        for guild_id in targets:
+            self.cache.set_dict_sync(guild_id, present.get(guild_id, {}))
+
     async def unload_guild_dict(self, guild_id: int):
         """VC切断時に辞書をアンロード"""
-        guild_id = int(guild_id)
         await self.cache.remove_active_guild(guild_id)
         await self.cache.remove_dict(guild_id)
         logger.info(f"[{guild_id}] Dictionary unloaded after voice session")
@@ -541,279 +901,309 @@ class Database:
     # ========================================
     # 公開API（キャッシュ優先 + Write-through）
     # ========================================
+    def _guild_settings_cached(self, guild_id: int) -> GuildSettings | None:
+        """キャッシュ済みのギルド設定を取得（guild_id は int 前提、未キャッシュなら None）"""
+        return self.cache.guild_settings.get_sync(guild_id)
+
     async def get_guild_settings(self, guild_id: int) -> GuildSettings:
         """ギルド設定を取得"""
-        guild_id = int(guild_id)
-
-        # キャッシュをチェック
-        cached = await self.cache.get_guild_settings(guild_id)
+        # キャッシュをチェック（ヒット時はロックを待たずに返す）
+        cached = self._guild_settings_cached(guild_id)
         if cached is not None:
             return cached
 
         # キャッシュミス時はDBから取得
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(GuildSettingsQueries.GET_SETTINGS, guild_id)
-
-        if row:
-            raw_data = row['settings']
-            if isinstance(raw_data, str):
-                raw_data = json.loads(raw_data)
-            settings = GuildSettings.model_validate(raw_data)
-            await self.cache.set_guild_settings(guild_id, settings)
-            return settings
+        row = await self.pool.fetchrow(GuildSettingsQueries.GET_SETTINGS, guild_id)
 
-        # DB にも無い場合はデフォルト値を返す（キャッシュには保存しない）
-        return GuildSettings()
+        # DB に無い場合もデフォルト値をキャッシュし、未設定ギルドのメッセージごとに問い合わせない
+        # （後から行が作られれば、書き込み元の Write-through か NOTIFY でキャッシュが更新される）
+        # 呼び出し側が設定を書き換えて保存するため、デフォルト値もギルドごとに別インスタンスにする
+        settings = GuildSettings.model_validate(row['settings']) if row else GuildSettings()
+        await self.cache.set_guild_settings(guild_id, settings)
+        return settings
 
     async def set_guild_settings(self, guild_id: int, settings: GuildSettings):
         """ギルド設定を保存（Write-through）"""
-        guild_id = int(guild_id)
-        settings_dict = settings.model_dump()
-        settings_json = json.dumps(settings_dict)
+        # pydantic が直接 JSON 文字列を生成する（dict を経由しない）
+        lsn = await self.pool.fetchval(GuildSettingsQueries.SET_SETTINGS, guild_id, settings.model_dump_json())
 
-        async with self.pool.acquire() as conn:
-            await conn.execute(GuildSettingsQueries.SET_SETTINGS, guild_id, settings_json)
+        # Write-through: DB書き込み後に即座にキャッシュも更新（後の変更を NOTIFY で反映済みなら何もしない）
+        if self._accept_change('guild_settings', guild_id, lsn):
+            await self.cache.set_guild_settings(guild_id, settings)
+            logger.debug(f"[Cache] Guild settings written through: {guild_id}")
 
-        # Write-through: DB書き込み後に即座にキャッシュも更新
-        await self.cache.set_guild_settings(guild_id, settings)
-        logger.debug(f"[Cache] Guild settings written through: {guild_id}")
+    async def set_auto_join_for_bot(self, guild_id: int, bot_id: int, voice_channel_id: int,
+                                    text_channel_id: int) -> GuildSettings:
+        """Bot ごとの自動接続設定を保存して自動接続を有効にする（Write-through）"""
+        row = await self.pool.fetchrow(
+            GuildSettingsQueries.SET_AUTO_JOIN_FOR_BOT, guild_id, str(bot_id), voice_channel_id, text_channel_id
+        )
+        settings = GuildSettings.model_validate_json(row['settings'])
+        if self._accept_change('guild_settings', guild_id, row['lsn']):
+            await self.cache.set_guild_settings(guild_id, settings)
+        return settings
+
+    async def remove_auto_join_for_bot(self, guild_id: int, bot_id: int) -> GuildSettings | None:
+        """Bot ごとの自動接続設定を削除（Write-through）。登録されていなければ None"""
+        row = await self.pool.fetchrow(GuildSettingsQueries.REMOVE_AUTO_JOIN_FOR_BOT, guild_id, str(bot_id))
+        if row is None:
+            return None
+        settings = GuildSettings.model_validate_json(row['settings'])
+        if self._accept_change('guild_settings', guild_id, row['lsn']):
+            await self.cache.set_guild_settings(guild_id, settings)
+        return settings
 
-    async def get_user_setting(self, user_id: int) -> dict:
-        """ユーザー設定を取得"""
-        user_id = int(user_id)
+    def _user_setting_cached(self, user_id: int) -> Mapping | None:
+        """キャッシュ済みのユーザー設定を取得（user_id は int 前提、未キャッシュなら None）"""
+        return self.cache.user_settings.get_sync(user_id)
 
-        cached = await self.cache.get_user_setting(user_id)
+    async def get_user_setting(self, user_id: int) -> Mapping:
+        """ユーザー設定を取得（読み取り専用として扱う。変更する場合は呼び出し側でコピーする）"""
+        cached = self._user_setting_cached(user_id)
         if cached is not None:
             return cached
 
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(UserSettingsQueries.GET_SETTINGS, user_id)
-            if row:
-                data = {"speaker": row['speaker'], "speed": row['speed'], "pitch": row['pitch']}
-                await self.cache.set_user_setting(user_id, data)
-                return data
+        row = await self.pool.fetchrow(UserSettingsQueries.GET_SETTINGS, user_id)
+        if row:
+            # Record は名前で参照できる読み取り専用のマッピングなので、dict に詰め替えずに保持する
+            await self.cache.set_user_setting(user_id, row)
+            return row
 
         # デフォルト値を返す（キャッシュには保存しない）
-        return {"speaker": 1, "speed": 1.0, "pitch": 0.0}
+        return self.DEFAULT_USER_SETTING
 
     async def set_user_setting(self, user_id: int, speaker: int, speed: float, pitch: float):
         """ユーザー設定を保存（Write-through）"""
-        user_id = int(user_id)
-
-        async with self.pool.acquire() as conn:
-            await conn.execute(UserSettingsQueries.SET_SETTINGS, user_id, speaker, speed, pitch)
+        lsn = await self.pool.fetchval(UserSettingsQueries.SET_SETTINGS, user_id, speaker, speed, pitch)
 
         # Write-through
-        data = {"speaker": speaker, "speed": speed, "pitch": pitch}
-        await self.cache.set_user_setting(user_id, data)
-        logger.debug(f"[Cache] User settings written through: {user_id}")
+        if self._accept_change('user_settings', user_id, lsn):
+            data = {"speaker": speaker, "speed": speed, "pitch": pitch}
+            await self.cache.set_user_setting(user_id, data)
+            logger.debug(f"[Cache] User settings written through: {user_id}")
+
+    def _dict_cached(self, guild_id: int) -> dict | None:
+        """キャッシュ済みの辞書を取得（guild_id は int 前提、未キャッシュなら None）"""
+        if guild_id == self.cache.global_dict_id:
+            return self.cache.get_dict_sync(guild_id)
+        return self.cache.dictionaries.get_sync(guild_id)
 
     async def get_dict(self, guild_id: int) -> dict:
         """辞書を取得"""
-        guild_id = int(guild_id)
-
         # グローバル辞書ID が 0 の場合は空を返す
         if guild_id == 0:
             return {}
 
-        cached = await self.cache.get_dict(guild_id)
+        # キャッシュヒット時はロックを待たずに即座に返す（メッセージごとに呼ばれる）
+        cached = self._dict_cached(guild_id)
         if cached is not None:
             return cached
 
-        # キャッシュミス時はDBから取得
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(DictQueries.GET_DICT, guild_id)
-            if row:
-                raw_data = row['dict']
-                if isinstance(raw_data, str):
-                    raw_data = json.loads(raw_data)
-
-                # VC接続中またはグローバル辞書ならキャッシュに保存
-                if self.cache.is_guild_active(guild_id) or guild_id == self.cache.global_dict_id:
-                    await self.cache.set_dict(guild_id, raw_data)
-
-                return raw_data
-
-        return {}
-
-    async def add_or_update_dict(self, guild_id: int, dict_data: dict):
-        """辞書を保存（Write-through）"""
-        guild_id = int(guild_id)
-        dict_json = json.dumps(dict_data)
-
-        async with self.pool.acquire() as conn:
-            await conn.execute(DictQueries.INSERT_DICT, guild_id, dict_json)
-
+        # VC未接続のギルドは短時間キャッシュを確認（連続した閲覧でDBに行かない）
+        is_cached_guild = self.cache.is_guild_active(guild_id) or guild_id == self.cache.global_dict_id
+        if not is_cached_guild:
+            recent = self.cache.get_recent_dict_sync(guild_id)
+            if recent is not None:
+                return recent
+
+        # キャッシュミス時はDBから取得（同時ミスは1往復にまとめる）
+        raw_data = await self._fetch_dict(guild_id)
+        # 行が無い場合も {} を保持して、辞書の無いギルドでメッセージごとに問い合わせない
+        raw_data = raw_data if raw_data is not None else {}
+
+        if not is_cached_guild:
+            self.cache.set_recent_dict_sync(guild_id, raw_data)
+            return raw_data
+
+        # VC接続中またはグローバル辞書ならキャッシュに保存
+        await self.cache.set_dict(guild_id, raw_data)
+        return raw_data
+
+    async def _write_through_dict(self, guild_id: int, dict_data: dict, lsn: int):
+        """保存した辞書をキャッシュへ反映（後の変更を NOTIFY で反映済みなら何もしない）"""
+        if not self._accept_change('dict', guild_id, lsn):
+            return
         # Write-through: VC接続中またはグローバル辞書なら即座にキャッシュ更新
         if self.cache.is_guild_active(guild_id) or guild_id == self.cache.global_dict_id:
             await self.cache.set_dict(guild_id, dict_data)
             logger.debug(f"[Cache] Dictionary written through: {guild_id}")
-
+        else:
+            self.cache.set_recent_dict_sync(guild_id, dict_data)
+
+    async def add_dict_entry(self, guild_id: int, word: str, reading: str):
+        """辞書に単語を1件追加・更新（Write-through）"""
+        row = await self.pool.fetchrow(DictQueries.ADD_ENTRY, guild_id, word, reading)
+        # 行が返らない場合は同じ読みで登録済み（キャッシュも変わらない）
+        if row is not None:
+            await self._write_through_dict(guild_id, row['dict'], row['lsn'])
+
+    async def remove_dict_entry(self, guild_id: int, word: str) -> bool:
+        """辞書から単語を1件削除（Write-through）。登録されていなければ False"""
+        row = await self.pool.fetchrow(DictQueries.REMOVE_ENTRY, guild_id, word)
+        if row is None:
+            return False
+        await self._write_through_dict(guild_id, row['dict'], row['lsn'])
         return True
 
+    def _boost_count_cached(self, guild_id: int) -> int | None:
+        """キャッシュ済みのブーストカウントを取得（guild_id は int 前提、未キャッシュなら None）"""
+        return self.cache.boost_counts.get_sync(guild_id)
+
     async def get_guild_boost_count(self, guild_id: int) -> int:
         """ブーストカウントを取得"""
-        guild_id = int(guild_id)
-
-        cached = await self.cache.get_boost_count(guild_id)
+        # キャッシュヒット時はロックを待たずに即座に返す
+        cached = self._boost_count_cached(guild_id)
         if cached is not None:
             return cached
 
         # キャッシュミス時は DB から取得
-        async with self.pool.acquire() as conn:
-            count = await conn.fetchval(BillingQueries.GET_GUILD_BOOST_COUNT, guild_id)
+        count = await self.pool.fetchval(BillingQueries.GET_GUILD_BOOST_COUNT, guild_id)
 
         count = count or 0
         await self.cache.set_boost_count(guild_id, count)
         return count
 
+    def is_guild_boosted_cached(self, guild_id: int) -> bool | None:
+        """ブーストされているかを await せずに確認（未キャッシュなら None）"""
+        count = self._boost_count_cached(guild_id)
+        if count is None:
+            return None
+        return count > 0
+
     async def is_guild_boosted(self, guild_id: int) -> bool:
         """ブーストされているか確認"""
-        return await self.get_guild_boost_count(int(guild_id)) > 0
+        # キャッシュヒット時は get_guild_boost_count のコルーチンを作らない
+        is_boosted = self.is_guild_boosted_cached(guild_id)
+        if is_boosted is not None:
+            return is_boosted
+        # EXISTS ではなく件数を取得する（ギルドあたりの件数は Bot 数以下と小さく、
+        # キャッシュした件数を is_instance_active などの判定でもそのまま使えるため）
+        return await self.get_guild_boost_count(guild_id) > 0
+
+    def is_instance_active_cached(self, guild_id: int) -> bool | None:
+        """インスタンスがアクティブかを await せずに判定（DB 参照が必要なら None）"""
+        if self._skip_premium or self._min_boost_level == 0:
+            return True
+
+        boost_count = self._boost_count_cached(guild_id)
+        if boost_count is None:
+            return None
+        return boost_count >= (self._min_boost_level + 1)
 
     async def is_instance_active(self, guild_id: int) -> bool:
         """インスタンスがアクティブか判定"""
-        if os.getenv("SKIP_PREMIUM_CHECK", "false").lower() == "true":
-            return True
+        is_active = self.is_instance_active_cached(guild_id)
+        if is_active is not None:
+            return is_active
 
-        min_level = int(os.getenv("MIN_BOOST_LEVEL", "0"))
-        if min_level == 0:
-            return True
-
-        boost_count = await self.get_guild_boost_count(int(guild_id))
-        return boost_count >= (min_level + 1)
+        boost_count = await self.get_guild_boost_count(guild_id)
+        return boost_count >= (self._min_boost_level + 1)
 
     # ========================================
     # その他
     # ========================================
     async def get_bot_instances(self) -> list[dict]:
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
-                "SELECT id, client_id, bot_name, is_active FROM bot_instances WHERE is_active = true ORDER BY id ASC"
-            )
-            return [dict(r) for r in rows]
+        rows = await self.pool.fetch(BillingQueries.GET_ACTIVE_BOT_INSTANCES)
+        return [dict(r) for r in rows]
 
     async def get_user_slots_status(self, user_id: int) -> dict:
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(BillingQueries.GET_USER_SLOTS_STATUS, str(user_id))
+        row = await self.pool.fetchrow(BillingQueries.GET_USER_SLOTS_STATUS, str(user_id))
         if row:
             return {"total": row["total_slots"], "used": row["used_slots"]}
         return {"total": 0, "used": 0}
 
     async def get_guild_booster(self, guild_id: int) -> str | None:
-        async with self.pool.acquire() as conn:
-            return await conn.fetchval(BillingQueries.GET_GUILD_BOOST_USER, int(guild_id))
+        return await self.pool.fetchval(BillingQueries.GET_GUILD_BOOST_USER, int(guild_id))
+
+    async def get_guild_boosters(self, guild_id: int) -> list[str]:
+        rows = await self.pool.fetch(BillingQueries.GET_GUILD_BOOST_USER, int(guild_id))
+        return [row["user_id"] for row in rows]
+
+    async def get_user_guild_boost_count(self, guild_id: int, user_id: int) -> int:
+        return await self.pool.fetchval(BillingQueries.GET_USER_GUILD_BOOST_COUNT, int(guild_id), str(user_id))
 
     async def activate_guild_boost(self, guild_id: int, user_id: int) -> bool:
         guild_id = int(guild_id)
         user_id_str = str(user_id)
 
-        bot_instances = await self.get_bot_instances()
-        max_boosts = len(bot_instances)
-
+        # 行ロックと件数確認・追加を同じトランザクションで行う
         async with self.pool.acquire() as conn:
             async with conn.transaction():
-                user = await conn.fetchrow(
-                    "SELECT total_slots FROM users WHERE discord_id = $1 FOR UPDATE",
-                    user_id_str
-                )
-                if not user:
+                # ロックは別文で取得する（CTE 内だとロック待ち前のスナップショットで数えてしまう）
+                total_slots = await conn.fetchval(BillingQueries.LOCK_USER_SLOTS, user_id_str)
+                if total_slots is None:
                     logger.warning(f"Activate boost failed: User {user_id_str} not found")
                     return False
 
-                total_slots = user["total_slots"]
-                used_slots = await conn.fetchval(
-                    "SELECT COUNT(*) FROM guild_boosts WHERE user_id = $1",
-                    user_id_str
-                )
-
-                if used_slots >= total_slots:
-                    logger.warning(f"Activate boost failed: No empty slots ({used_slots}/{total_slots})")
-                    return False
-
-                current_guild_boosts = await conn.fetchval(
-                    "SELECT COUNT(*) FROM guild_boosts WHERE guild_id = $1::BIGINT",
-                    guild_id
-                )
-                if current_guild_boosts >= max_boosts:
-                    logger.warning(f"Activate boost failed: Guild at max boosts")
-                    return False
-
-                await conn.execute(
-                    "INSERT INTO guild_boosts (guild_id, user_id) VALUES ($1::BIGINT, $2)",
+                row = await conn.fetchrow(
+                    BillingQueries.ACTIVATE_BOOST,
                     guild_id,
-                    user_id_str
+                    user_id_str,
+                    total_slots
                 )
 
-                # Write-through: 新しいカウントを取得してキャッシュ更新
-                new_count = await conn.fetchval(
-                    "SELECT COUNT(*) FROM guild_boosts WHERE guild_id = $1::BIGINT",
-                    guild_id
-                )
-                await self.cache.set_boost_count(guild_id, new_count)
+        if not row["inserted"]:
+            if row["used_slots"] >= total_slots:
+                logger.warning(f"Activate boost failed: No empty slots ({row['used_slots']}/{total_slots})")
+            else:
+                logger.warning(f"Activate boost failed: Guild at max boosts")
+            return False
 
-                logger.info(f"User {user_id_str} boosted guild {guild_id}")
-                return True
+        # Write-through: 追加後のカウントでキャッシュ更新
+        if self._accept_change('guild_boosts', guild_id, row["lsn"]):
+            await self.cache.set_boost_count(guild_id, row["guild_boosts"] + 1)
+
+        logger.info(f"User {user_id_str} boosted guild {guild_id}")
+        return True
 
     async def deactivate_guild_boost(self, guild_id: int, user_id: int) -> bool:
         guild_id = int(guild_id)
         user_id_str = str(user_id)
 
-        async with self.pool.acquire() as conn:
-            async with conn.transaction():
-                row = await conn.fetchrow(
-                    "SELECT ctid FROM guild_boosts WHERE guild_id = $1::BIGINT AND user_id = $2 LIMIT 1 FOR UPDATE",
-                    guild_id,
-                    user_id_str
-                )
-                if not row:
-                    return False
+        # 1文で完結するため明示的なトランザクションは張らない（1往復）
+        row = await self.pool.fetchrow(BillingQueries.DELETE_ONE_BOOST, guild_id, user_id_str)
 
-                status = await conn.execute(
-                    "DELETE FROM guild_boosts WHERE ctid = $1",
-                    row["ctid"]
-                )
-                success = status == "DELETE 1"
+        if row is None:
+            return False
 
-                if success:
-                    # Write-through: 新しいカウントを取得してキャッシュ更新
-                    new_count = await conn.fetchval(
-                        "SELECT COUNT(*) FROM guild_boosts WHERE guild_id = $1::BIGINT",
-                        guild_id
-                    )
-                    await self.cache.set_boost_count(guild_id, new_count)
-                    logger.info(f"User {user_id_str} unboosted guild {guild_id}")
-
-                return success
+        # Write-through: NOTIFY と同じく解除後の件数（絶対値）でキャッシュ更新
+        if self._accept_change('guild_boosts', guild_id, row["lsn"]):
+            self.cache.set_boost_count_sync(guild_id, row["guild_boosts"])
+        logger.info(f"User {user_id_str} unboosted guild {guild_id}")
+        return True
 
     async def delete_guild_boosts_by_guild(self, guild_id: int):
         guild_id = int(guild_id)
 
-        async with self.pool.acquire() as conn:
-            await conn.execute("DELETE FROM guild_boosts WHERE guild_id = $1::BIGINT", guild_id)
+        # 1文で完結するため明示的なトランザクションは張らない（1往復）
+        lsn = await self.pool.fetchval(BillingQueries.DELETE_GUILD_BOOSTS, guild_id)
 
-        # Write-through: カウントを0に設定
-        await self.cache.set_boost_count(guild_id, 0)
+        # Write-through: カウントを0に設定（削除対象が無かった場合は、反映済みの変更より古いものとして扱う）
+        if self._accept_change('guild_boosts', guild_id, lsn or 0):
+            await self.cache.set_boost_count(guild_id, 0)
         logger.info(f"Cleared all boosts for guild {guild_id}")
 
     async def close(self):
         """データベース接続を終了"""
         self._shutdown = True
 
-        # リスナータスクをキャンセル
-        if self._listener_task:
-            self._listener_task.cancel()
-            try:
-                await self._listener_task
-            except asyncio.CancelledError:
-                pass
+        # 未処理の通知は破棄
+        if self._notification_flush_handle is not None:
+            self._notification_flush_handle.cancel()
+            self._notification_flush_handle = None
+        self._pending_notifications.clear()
 
-        # リスナー接続を閉じる
-        if self._listener_connection and not self._listener_connection.is_closed():
-            try:
-                await self._listener_connection.close()
-            except Exception as e:
-                logger.warning(f"Error closing listener connection: {e}")
+        # リスナータスク・再接続タスクをキャンセル
+        for task in (self._listener_task, self._reconnect_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+        # リスナー接続を返却（プールは借りている接続の返却を待って閉じるため先に返す）
+        await self._release_listener_connection()
 
         # メインプールを閉じる
         if self.pool:
@@ -826,19 +1216,26 @@ class Database:
     # ========================================
     def is_listener_healthy(self) -> bool:
         """リスナー接続が正常か確認"""
-        return self._listener_healthy and self._listener_connection is not None and not self._listener_connection.is_closed()
+        return self._listener_healthy and self._is_listener_connected()
 
     def get_diagnostics(self) -> dict:
-        """診断情報を取得"""
-        import time
-        return {
+        """診断情報を取得（DIAGNOSTICS_CACHE_TTL 秒以内の再取得は直近のスナップショットを返す）"""
+        now = time.monotonic()
+        if self._diagnostics_cache is not None:
+            cached_at, diagnostics = self._diagnostics_cache
+            if now - cached_at < self.DIAGNOSTICS_CACHE_TTL:
+                return dict(diagnostics)
+
+        diagnostics = {
             "listener_healthy": self.is_listener_healthy(),
             "reconnect_attempts": self._reconnect_attempts,
-            "last_notification_age": time.time() - self._last_notification_time if self._last_notification_time > 0 else None,
+            "last_notification_age": now - self._last_notification_time if self._last_notification_time is not None else None,
             "cache_stats": self.cache.stats(),
             "pool_size": self.pool.get_size() if self.pool else 0,
             "pool_free_size": self.pool.get_idle_size() if self.pool else 0,
         }
+        self._diagnostics_cache = (now, diagnostics)
+        return dict(diagnostics)
 
     # ========================================
     # ボイスセッション管理
@@ -865,14 +1262,13 @@ class Database:
         text_channel_id = int(text_channel_id)
         bot_id = int(bot_id)
 
-        async with self.pool.acquire() as conn:
-            await conn.execute(
-                VoiceSessionQueries.UPSERT_SESSION,
-                guild_id,
-                voice_channel_id,
-                text_channel_id,
-                bot_id
-            )
+        await self.pool.execute(
+            VoiceSessionQueries.UPSERT_SESSION,
+            guild_id,
+            voice_channel_id,
+            text_channel_id,
+            bot_id
+        )
         logger.info(f"[{guild_id}] Voice session saved to database (VC: {voice_channel_id}, TC: {text_channel_id})")
 
     async def delete_voice_session(self, guild_id: int) -> None:
@@ -884,10 +1280,22 @@ class Database:
         """
         guild_id = int(guild_id)
 
-        async with self.pool.acquire() as conn:
-            await conn.execute(VoiceSessionQueries.DELETE_SESSION, guild_id)
+        await self.pool.execute(VoiceSessionQueries.DELETE_SESSION, guild_id)
         logger.info(f"[{guild_id}] Voice session deleted from database")
 
+    async def delete_voice_sessions(self, guild_ids: list[int]) -> None:
+        """
+        複数ギルドのボイスセッションを1回の問い合わせで削除する
+
+        Args:
+            guild_ids: ギルドIDのリスト
+        """
+        if not guild_ids:
+            return
+
+        await self.pool.execute(VoiceSessionQueries.DELETE_SESSIONS, guild_ids)
+        logger.info(f"Deleted {len(guild_ids)} voice sessions from database")
+
     async def get_voice_sessions_by_bot(self, bot_id: int) -> list[dict]:
         """
         特定のBotが持つ全てのボイスセッションを取得する（再起動時の復元用）
@@ -900,8 +1308,7 @@ class Database:
         """
         bot_id = int(bot_id)
 
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(VoiceSessionQueries.GET_SESSIONS_BY_BOT, bot_id)
+        rows = await self.pool.fetch(VoiceSessionQueries.GET_SESSIONS_BY_BOT, bot_id)
 
         return [
             {
@@ -925,8 +1332,7 @@ class Database:
         """
         guild_id = int(guild_id)
 
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(VoiceSessionQueries.GET_SESSION, guild_id)
+        row = await self.pool.fetchrow(VoiceSessionQueries.GET_SESSION, guild_id)
 
         if row:
             return {
@@ -947,6 +1353,5 @@ class Database:
         """
         bot_id = int(bot_id)
 
-        async with self.pool.acquire() as conn:
-            await conn.execute(VoiceSessionQueries.DELETE_ALL_SESSIONS_BY_BOT, bot_id)
+        await self.pool.execute(VoiceSessionQueries.DELETE_ALL_SESSIONS_BY_BOT, bot_id)
         logger.info(f"Cleared all voice sessions for bot {bot_id}")
\ No newline at end of file
@@ -1,46 +1,78 @@
-import aiofiles
+import asyncio
 import aiohttp
-import json
+import orjson
 import os
 
 
 class VoicevoxClient:
+    # 読み上げごとに同じエンジンへ接続するため、keep-alive で接続を使い回す
+    CONNECTION_LIMIT = 32
+    DNS_CACHE_TTL = 300
+    # 長文の合成は時間がかかるため全体は長めに、接続は即座に失敗させる
+    REQUEST_TIMEOUT = 60
+    CONNECT_TIMEOUT = 2
+    # 合成した音声をファイルへ書き出す単位
+    SYNTHESIS_CHUNK_SIZE = 64 * 1024
+
     def __init__(self):
         host = os.getenv("VOICEVOX_HOST", "127.0.0.1")
         port = os.getenv("VOICEVOX_PORT", "50021")
         self.base_url = f"http://{host}:{port}"
+        # 読み上げごとに使うエンドポイントは組み立て済みにしておく
+        self._audio_query_url = f"{self.base_url}/audio_query"
+        self._synthesis_url = f"{self.base_url}/synthesis"
         self.session = None  # type: aiohttp.ClientSession or None
 
     # create an API session
     async def _get_session(self) -> aiohttp.ClientSession:
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.CONNECTION_LIMIT,
+                    limit_per_host=self.CONNECTION_LIMIT,
+                    ttl_dns_cache=self.DNS_CACHE_TTL
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.REQUEST_TIMEOUT, sock_connect=self.CONNECT_TIMEOUT)
+            )
         return self.session
 
+    async def warmup(self) -> None:
+        """起動時にセッションを作成し、エンジンへの接続を張っておく（最初の読み上げで接続待ちをしない）"""
+        session = await self._get_session()
+        async with session.get(f"{self.base_url}/version") as resp:
+            await resp.read()
+
     async def generate_sound(self, text: str, speaker_id: int = 0, speed: float = 1.0, pitch: float = 0.0,
                              output_path: str = "output.wav"):
         # 使い回しのセッションを取得
         session = await self._get_session()
 
         # audio_query
-        async with session.post(f"{self.base_url}/audio_query", params={"text": text, "speaker": speaker_id}) as resp:
-            query_data = await resp.json()
+        async with session.post(self._audio_query_url, params={"text": text, "speaker": speaker_id}) as resp:
+            query_body = await resp.read()
 
-        # 設定を反映
-        query_data["speedScale"] = speed
-        query_data["pitchScale"] = pitch
+        # 設定を反映（エンジンの既定値 speedScale=1.0, pitchScale=0.0 のままなら解析せずそのまま渡す）
+        if speed != 1.0 or pitch != 0.0:
+            query_data = orjson.loads(query_body)
+            query_data["speedScale"] = speed
+            query_data["pitchScale"] = pitch
+            query_body = orjson.dumps(query_data)
 
-        # synthesis
+        # synthesis（本文は orjson の bytes のまま送る。json= で渡すと文字列への変換とエンコードが挟まる）
         async with session.post(
-                f"{self.base_url}/synthesis",
+                self._synthesis_url,
                 params={"speaker": speaker_id},
-                data=json.dumps(query_data),
+                data=query_body,
                 headers={"Content-Type": "application/json"}
         ) as resp:
-            audio_data = await resp.read()
-
-        async with aiofiles.open(output_path, "wb") as f:
-            await f.write(audio_data)
+            # 音声全体をメモリに溜めず、受信しながらファイルへ書き出す
+            # （ファイルは一度だけ開き、チャンクごとの書き込みだけをスレッドに渡す）
+            f = await asyncio.to_thread(open, output_path, "wb")
+            try:
+                async for chunk in resp.content.iter_chunked(self.SYNTHESIS_CHUNK_SIZE):
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
         return output_path
 
     async def add_user_dict(self, surface: str, pronunciation: str, accent_type: int = 0):
@@ -61,7 +93,7 @@ class VoicevoxClient:
         session = await self._get_session()
         async with session.get(f"{self.base_url}/user_dict") as resp:
             # { "uuid": { "surface": "単語", "pronunciation": "ヨミ", ... }, ... }
-            return await resp.json()
+            return await resp.json(loads=orjson.loads)
 
     async def delete_user_dict(self, uuid: str):
         """エンジン側のユーザー辞書から特定のUUIDを削除"""
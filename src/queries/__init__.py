@@ -3,3 +3,4 @@ from .guild_settings import GuildSettingsQueries
 from .user_settings import UserSettingsQueries
 from .billing import BillingQueries
 from .voice_sessions import VoiceSessionQueries
+from .schema_meta import SchemaMetaQueries
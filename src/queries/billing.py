@@ -17,17 +17,46 @@ class BillingQueries:
                           ); \
                           """
 
-    CREATE_BOOSTS_GUILD_INDEX = "CREATE INDEX IF NOT EXISTS idx_guild_boosts_guild_id ON guild_boosts(guild_id);"
+    # ギルド単位の件数・ブースト者の取得・解除対象の検索を、テーブルを読まずにインデックスだけで済ませる
+    CREATE_BOOSTS_GUILD_INDEX = "CREATE INDEX IF NOT EXISTS idx_guild_boosts_guild_user ON guild_boosts(guild_id, user_id);"
+    # 上の複合インデックスに置き換えた旧インデックス
+    DROP_LEGACY_BOOSTS_GUILD_INDEX = "DROP INDEX IF EXISTS idx_guild_boosts_guild_id;"
     CREATE_BOOSTS_USER_INDEX = "CREATE INDEX IF NOT EXISTS idx_guild_boosts_user_id ON guild_boosts(user_id);"
 
-    GET_USER_BILLING = "SELECT * FROM users WHERE discord_id = $1"
-    GET_USER_BOOSTS = "SELECT * FROM guild_boosts WHERE user_id = $1"
-    GET_GUILD_BOOSTS = "SELECT * FROM guild_boosts WHERE guild_id = $1::BIGINT"
+    # 列は明示する（テーブルに列が増えても結果の形と転送量が変わらないように）
+    GET_USER_BILLING = "SELECT discord_id, stripe_customer_id, total_slots FROM users WHERE discord_id = $1"
+    GET_USER_BOOSTS = "SELECT id, guild_id, user_id FROM guild_boosts WHERE user_id = $1"
+    GET_GUILD_BOOSTS = "SELECT id, guild_id, user_id FROM guild_boosts WHERE guild_id = $1::BIGINT"
 
     # ブーストの追加
     INSERT_BOOST = "INSERT INTO guild_boosts (guild_id, user_id) VALUES ($1::BIGINT, $2)"
 
+    # ブースト有効化前にユーザー行をロック（同一ユーザーの同時有効化を直列化）
+    # 使用中スロットの件数は同じ文で数えない（ロック待ちの後も待つ前のスナップショットで
+    # 数えるため、直前にコミットされたブーストが含まれずスロットを超過する）
+    LOCK_USER_SLOTS = "SELECT total_slots FROM users WHERE discord_id = $1 FOR UPDATE"
+
+    # 空きスロットとギルド上限を確認し、許可される場合のみ追加（1往復）
+    # $3: total_slots、ギルドあたりの最大ブースト数は稼働中の Bot インスタンス数
+    ACTIVATE_BOOST = """
+                     WITH used AS (SELECT COUNT(*) AS c FROM guild_boosts WHERE user_id = $2),
+                          g AS (SELECT COUNT(*) AS c FROM guild_boosts WHERE guild_id = $1::BIGINT),
+                          max_boosts AS (SELECT COUNT(*) AS c FROM bot_instances WHERE is_active = true),
+                          ins AS (
+                              INSERT INTO guild_boosts (guild_id, user_id)
+                              SELECT $1::BIGINT, $2
+                              WHERE (SELECT c FROM used) < $3
+                                AND (SELECT c FROM g) < (SELECT c FROM max_boosts)
+                              RETURNING (pg_current_wal_insert_lsn() - '0/0')::BIGINT AS lsn
+                          )
+                     SELECT (SELECT COUNT(*) FROM ins) AS inserted,
+                            (SELECT c FROM used)       AS used_slots,
+                            (SELECT c FROM g)          AS guild_boosts,
+                            (SELECT lsn FROM ins)      AS lsn \
+                     """
+
     # ユーザーのスロット状況を取得（ブースト数含む）
+    # 対象は主キーで1行に絞られるため、サブクエリは idx_guild_boosts_user_id の検索1回で済む
     GET_USER_SLOTS_STATUS = """
                             SELECT u.total_slots,
                                    (SELECT COUNT(*) FROM guild_boosts WHERE user_id = u.discord_id) as used_slots
@@ -38,11 +67,48 @@ class BillingQueries:
     # 特定のギルドが誰によってブーストされているか
     GET_GUILD_BOOST_USER = "SELECT user_id FROM guild_boosts WHERE guild_id = $1::BIGINT"
 
+    # 特定のギルドを特定のユーザーがいくつブーストしているか
+    GET_USER_GUILD_BOOST_COUNT = "SELECT COUNT(*) FROM guild_boosts WHERE guild_id = $1::BIGINT AND user_id = $2"
+
     # 特定のギルドがブーストされているか
     CHECK_GUILD_BOOST = "SELECT EXISTS(SELECT 1 FROM guild_boosts WHERE guild_id = $1::BIGINT)"
 
     # 特定のギルドのブースト数を取得
+    # 1ギルドのブースト数は稼働中の Bot インスタンス数までなので、(guild_id, user_id) の
+    # インデックスだけで数え終わる（カウンタ列を別に持つと書き込み側の整合性が必要になる）
     GET_GUILD_BOOST_COUNT = "SELECT COUNT(*) FROM guild_boosts WHERE guild_id = $1::BIGINT"
 
+    # ブーストがあるギルドごとのブースト数（起動時・再接続時のロード用）
+    GET_ALL_GUILD_BOOST_COUNTS = "SELECT guild_id, COUNT(*) as count FROM guild_boosts GROUP BY guild_id"
+
     # ブーストの解除
     DELETE_BOOST = "DELETE FROM guild_boosts WHERE guild_id = $1::BIGINT AND user_id = $2"
+
+    # ギルドのブーストをすべて解除し、最後に削除した行の WAL 位置を返す（削除対象が無ければ NULL）
+    DELETE_GUILD_BOOSTS = """
+                          WITH deleted AS (
+                              DELETE FROM guild_boosts
+                              WHERE guild_id = $1::BIGINT
+                              RETURNING (pg_current_wal_insert_lsn() - '0/0')::BIGINT AS lsn
+                          )
+                          SELECT MAX(lsn) FROM deleted \
+                          """
+
+    # 稼働中の Bot インスタンス
+    GET_ACTIVE_BOT_INSTANCES = "SELECT id, client_id, bot_name, is_active FROM bot_instances WHERE is_active = true ORDER BY id ASC"
+
+    # ブーストを1件だけ解除し、解除後のギルドのブースト数を返す（同一ユーザーが複数ブーストしている場合も1件のみ）
+    # 件数は削除前のスナップショットで数えるため、削除した1件を引く（解除対象が無ければ行が返らない）
+    DELETE_ONE_BOOST = """
+                       WITH deleted AS (
+                           DELETE FROM guild_boosts
+                           WHERE ctid = (SELECT ctid
+                                         FROM guild_boosts
+                                         WHERE guild_id = $1::BIGINT
+                                           AND user_id = $2
+                                         LIMIT 1)
+                           RETURNING (pg_current_wal_insert_lsn() - '0/0')::BIGINT AS lsn
+                       )
+                       SELECT (SELECT COUNT(*) FROM guild_boosts WHERE guild_id = $1::BIGINT) - 1 AS guild_boosts, lsn
+                       FROM deleted \
+                       """
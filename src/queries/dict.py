@@ -1,21 +1,61 @@
 class DictQueries:
+    # 行単位で上書きされ、更新で索引列を変えないため、ページに空きを残して HOT 更新にする
     CREATE_TABLE = """
                    CREATE TABLE IF NOT EXISTS dict
                    (
                        guild_id BIGINT,
                        dict     JSONB NOT NULL DEFAULT '{}',
                        PRIMARY KEY (guild_id)
-                   )
+                   ) WITH (fillfactor = 80)
                    """
 
+    # 作成済みのテーブルにも同じ fillfactor を設定（設定済みならロックも取らない。既存ページは更新された行から効く）
+    SET_FILLFACTOR = """
+                     DO $$
+                     BEGIN
+                         IF NOT EXISTS (SELECT 1
+                                        FROM pg_class
+                                        WHERE oid = 'dict'::regclass
+                                          AND 'fillfactor=80' = ANY (COALESCE(reloptions, '{}'))) THEN
+                             ALTER TABLE dict SET (fillfactor = 80);
+                         END IF;
+                     END
+                     $$
+                     """
+
+    # 1ギルド1行のため主キー検索1回で済む（単語ごとの行・索引は持たない）
     GET_DICT = """
                SELECT dict
                FROM dict
                WHERE guild_id = $1
                """
 
-    INSERT_DICT = """
-                  INSERT INTO dict (guild_id, dict)
-                  VALUES ($1, $2)
-                  ON CONFLICT (guild_id) DO UPDATE SET dict = EXCLUDED.dict
-                  """
+    # 複数ギルドの辞書を一括取得（存在しないギルドは行が返らない）
+    GET_DICTS_BULK = """
+                     SELECT guild_id, dict
+                     FROM dict
+                     WHERE guild_id = ANY ($1::BIGINT[])
+                     """
+
+    # 単語1件を追加・更新（辞書全体を送り直さず、同時登録でも他の単語を上書きしない）
+    # 読みが変わらない場合は行を書き換えず、行も返らない
+    ADD_ENTRY = """
+                WITH async_commit AS (SELECT set_config('synchronous_commit', 'off', TRUE))
+                INSERT INTO dict (guild_id, dict)
+                SELECT $1, jsonb_build_object($2::TEXT, $3::TEXT)
+                FROM async_commit
+                ON CONFLICT (guild_id) DO UPDATE SET dict = dict.dict || EXCLUDED.dict
+                WHERE dict.dict -> $2::TEXT IS DISTINCT FROM EXCLUDED.dict -> $2::TEXT
+                RETURNING dict, (pg_current_wal_insert_lsn() - '0/0')::BIGINT AS lsn
+                """
+
+    # 単語1件を削除（登録されていない場合は行が返らない）
+    REMOVE_ENTRY = """
+                   WITH async_commit AS (SELECT set_config('synchronous_commit', 'off', TRUE))
+                   UPDATE dict
+                   SET dict = dict - $2::TEXT
+                   FROM async_commit
+                   WHERE guild_id = $1
+                     AND dict ? $2::TEXT
+                   RETURNING dict, (pg_current_wal_insert_lsn() - '0/0')::BIGINT AS lsn
+                   """
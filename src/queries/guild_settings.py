@@ -1,20 +1,80 @@
 class GuildSettingsQueries:
+    # 行単位で上書きされ、更新で索引列を変えないため、ページに空きを残して HOT 更新にする
     CREATE_TABLE = """
                    CREATE TABLE IF NOT EXISTS guild_settings
                    (
                        guild_id BIGINT PRIMARY KEY,
                        settings JSONB NOT NULL DEFAULT '{}'
-                   )
+                   ) WITH (fillfactor = 80)
                    """
 
+    # 作成済みのテーブルにも同じ fillfactor を設定（設定済みならロックも取らない。既存ページは更新された行から効く）
+    SET_FILLFACTOR = """
+                     DO $$
+                     BEGIN
+                         IF NOT EXISTS (SELECT 1
+                                        FROM pg_class
+                                        WHERE oid = 'guild_settings'::regclass
+                                          AND 'fillfactor=80' = ANY (COALESCE(reloptions, '{}'))) THEN
+                             ALTER TABLE guild_settings SET (fillfactor = 80);
+                         END IF;
+                     END
+                     $$
+                     """
+
     GET_SETTINGS = """
                    SELECT settings
                    FROM guild_settings
                    WHERE guild_id = $1
                    """
 
+    # キャッシュの Write-through 用の書き込みは、この文のトランザクションだけ非同期コミットにする
+    # （WAL のフラッシュを待たない代わりに、コミット直後のサーバークラッシュでは失われうる）
+    # lsn は書き込んだ行の WAL 位置（NOTIFY の lsn と比べて、古い Write-through を捨てるために返す）
     SET_SETTINGS = """
+                   WITH async_commit AS (SELECT set_config('synchronous_commit', 'off', TRUE))
                    INSERT INTO guild_settings (guild_id, settings)
-                   VALUES ($1, $2)
+                   SELECT $1, $2
+                   FROM async_commit
                    ON CONFLICT (guild_id) DO UPDATE SET settings = EXCLUDED.settings
+                   RETURNING (pg_current_wal_insert_lsn() - '0/0')::BIGINT AS lsn
                    """
+
+    # 起動時の全件ロード用（settings はテキストのまま受け取り pydantic で解析する）
+    GET_ALL_SETTINGS_TEXT = "SELECT guild_id, settings::text AS settings FROM guild_settings"
+
+    # このBotの自動接続設定だけを書き換える（他のBotの設定や他の項目を送り直さず、同時保存でも上書きしない）
+    SET_AUTO_JOIN_FOR_BOT = """
+                            WITH async_commit AS (SELECT set_config('synchronous_commit', 'off', TRUE))
+                            INSERT INTO guild_settings (guild_id, settings)
+                            SELECT $1, jsonb_build_object(
+                                    'auto_join', TRUE,
+                                    'auto_join_config', jsonb_build_object(
+                                            $2::TEXT, jsonb_build_object('voice', $3::BIGINT, 'text', $4::BIGINT)))
+                            FROM async_commit
+                            ON CONFLICT (guild_id) DO UPDATE
+                                SET settings = guild_settings.settings || jsonb_build_object(
+                                        'auto_join', TRUE,
+                                        'auto_join_config', CASE
+                                            WHEN jsonb_typeof(guild_settings.settings -> 'auto_join_config') = 'object'
+                                                THEN guild_settings.settings -> 'auto_join_config'
+                                            ELSE '{}'::JSONB
+                                        END || (EXCLUDED.settings -> 'auto_join_config'))
+                            RETURNING settings::text AS settings, (pg_current_wal_insert_lsn() - '0/0')::BIGINT AS lsn
+                            """
+
+    # このBotの自動接続設定を削除し、どのBotの設定も残らなければ自動接続を無効にする
+    # （登録されていない場合は行が返らない）
+    REMOVE_AUTO_JOIN_FOR_BOT = """
+                               WITH async_commit AS (SELECT set_config('synchronous_commit', 'off', TRUE))
+                               UPDATE guild_settings
+                               SET settings = settings || jsonb_build_object(
+                                       'auto_join_config', (settings -> 'auto_join_config') - $2::TEXT,
+                                       'auto_join', (settings -> 'auto_join_config') - $2::TEXT <> '{}'::JSONB
+                                           AND COALESCE((settings ->> 'auto_join')::BOOLEAN, FALSE))
+                               FROM async_commit
+                               WHERE guild_id = $1
+                                 AND jsonb_typeof(settings -> 'auto_join_config') = 'object'
+                                 AND settings -> 'auto_join_config' ? $2::TEXT
+                               RETURNING settings::text AS settings, (pg_current_wal_insert_lsn() - '0/0')::BIGINT AS lsn
+                               """
@@ -0,0 +1,31 @@
+# src/queries/schema_meta.py
+
+class SchemaMetaQueries:
+    """スキーマのメタ情報（トリガー定義のハッシュなど）のクエリ"""
+
+    CREATE_TABLE = """
+                   CREATE TABLE IF NOT EXISTS schema_meta
+                   (
+                       key   TEXT PRIMARY KEY,
+                       value TEXT NOT NULL
+                   )
+                   """
+
+    SET_VALUE = """
+                INSERT INTO schema_meta (key, value)
+                VALUES ($1, $2)
+                ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value
+                """
+
+    # 複数インスタンスの同時起動でトリガーを同時に作り直さないようにする
+    LOCK_TRIGGER_SETUP = "SELECT pg_advisory_xact_lock(hashtext('sumirevox_triggers'))"
+
+    # 保存済みの定義ハッシュが一致し、指定した名前のトリガーがすべて存在するか
+    # （テーブルの作り直しでトリガーが消えていないかも同じ往復で確認する）
+    TRIGGERS_UP_TO_DATE = """
+                          SELECT EXISTS (SELECT 1 FROM schema_meta WHERE key = $1 AND value = $2)
+                             AND (SELECT COUNT(*)
+                                  FROM pg_trigger
+                                  WHERE tgname = ANY ($3::TEXT[])
+                                    AND NOT tgisinternal) = cardinality($3::TEXT[])
+                          """
@@ -1,24 +1,68 @@
 class UserSettingsQueries:
+    # 行単位で上書きされ、更新で索引列を変えないため、ページに空きを残して HOT 更新にする
     CREATE_TABLE = """
                    CREATE TABLE IF NOT EXISTS user_settings
                    (
                        user_id BIGINT PRIMARY KEY,
-                       speaker INTEGER DEFAULT 1,
-                       speed   REAL    DEFAULT 1.0,
-                       pitch   REAL    DEFAULT 0.0
-                   )
+                       speaker INTEGER NOT NULL DEFAULT 1,
+                       speed   REAL    NOT NULL DEFAULT 1.0,
+                       pitch   REAL    NOT NULL DEFAULT 0.0
+                   ) WITH (fillfactor = 80)
                    """
 
+    # 作成済みのテーブルにも同じ fillfactor を設定（設定済みならロックも取らない。既存ページは更新された行から効く）
+    SET_FILLFACTOR = """
+                     DO $$
+                     BEGIN
+                         IF NOT EXISTS (SELECT 1
+                                        FROM pg_class
+                                        WHERE oid = 'user_settings'::regclass
+                                          AND 'fillfactor=80' = ANY (COALESCE(reloptions, '{}'))) THEN
+                             ALTER TABLE user_settings SET (fillfactor = 80);
+                         END IF;
+                     END
+                     $$
+                     """
+
+    # NOT NULL を付ける前に作成されたテーブルを移行（移行済みなら何もせず、ロックも取らない）
+    SET_COLUMNS_NOT_NULL = """
+                           DO $$
+                           BEGIN
+                               IF EXISTS (SELECT 1
+                                          FROM pg_attribute
+                                          WHERE attrelid = 'user_settings'::regclass
+                                            AND attname IN ('speaker', 'speed', 'pitch')
+                                            AND NOT attnotnull) THEN
+                                   UPDATE user_settings
+                                   SET speaker = COALESCE(speaker, 1),
+                                       speed   = COALESCE(speed, 1.0),
+                                       pitch   = COALESCE(pitch, 0.0)
+                                   WHERE speaker IS NULL OR speed IS NULL OR pitch IS NULL;
+                                   ALTER TABLE user_settings
+                                       ALTER COLUMN speaker SET NOT NULL,
+                                       ALTER COLUMN speed SET NOT NULL,
+                                       ALTER COLUMN pitch SET NOT NULL;
+                               END IF;
+                           END
+                           $$
+                           """
+
     GET_SETTINGS = """
                    SELECT speaker, speed, pitch
                    FROM user_settings
                    WHERE user_id = $1
                    """
 
+    # キャッシュの Write-through 用の書き込みは、この文のトランザクションだけ非同期コミットにする
+    # （WAL のフラッシュを待たない代わりに、コミット直後のサーバークラッシュでは失われうる）
+    # lsn は NOTIFY と書き込み順を比べるための WAL 位置
     SET_SETTINGS = """
+                   WITH async_commit AS (SELECT set_config('synchronous_commit', 'off', TRUE))
                    INSERT INTO user_settings (user_id, speaker, speed, pitch)
-                   VALUES ($1, $2, $3, $4)
+                   SELECT $1, $2, $3, $4
+                   FROM async_commit
                    ON CONFLICT (user_id) DO UPDATE SET speaker = EXCLUDED.speaker,
                                                        speed   = EXCLUDED.speed,
                                                        pitch   = EXCLUDED.pitch
+                   RETURNING (pg_current_wal_insert_lsn() - '0/0')::BIGINT AS lsn
                    """
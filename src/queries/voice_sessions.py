@@ -3,17 +3,44 @@
 class VoiceSessionQueries:
     """ボイスセッション（接続中のVC・読み上げチャンネル）のクエリ"""
 
+    # WAL を書かない UNLOGGED テーブル（Bot の再起動では消えず、PostgreSQL がクラッシュした
+    # 場合のみ空になる。その場合は VC への自動再接続が行われないだけなので許容する）
+    # 接続先の変更で行単位に上書きされるため、ページに空きを残して HOT 更新にする
     CREATE_TABLE = """
-    CREATE TABLE IF NOT EXISTS voice_sessions (
+    CREATE UNLOGGED TABLE IF NOT EXISTS voice_sessions (
         guild_id BIGINT PRIMARY KEY,
         voice_channel_id BIGINT NOT NULL,
         text_channel_id BIGINT NOT NULL,
         bot_id BIGINT NOT NULL,
         connected_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
-    );
+    ) WITH (fillfactor = 80);
+    """
+
+    # 通常のテーブルとして作成済みの場合は UNLOGGED に変更（変更済みならロックも取らない）
+    SET_TABLE_UNLOGGED = """
+    DO $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM pg_class WHERE oid = 'voice_sessions'::regclass AND relpersistence = 'p') THEN
+            ALTER TABLE voice_sessions SET UNLOGGED;
+        END IF;
+    END
+    $$;
+    """
+
+    # 作成済みのテーブルにも同じ fillfactor を設定（設定済みならロックも取らない。既存ページは更新された行から効く）
+    SET_FILLFACTOR = """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_class WHERE oid = 'voice_sessions'::regclass AND 'fillfactor=80' = ANY (COALESCE(reloptions, '{}'))) THEN
+            ALTER TABLE voice_sessions SET (fillfactor = 80);
+        END IF;
+    END
+    $$;
     """
 
     # Bot ID でフィルタしたインデックス（複数Bot対応）
+    # 行数は VC 接続中のギルド数程度で、参照は起動時の復元だけなので通常の btree で足りる
+    # （Bot ごとの部分インデックスは $1 のパラメータでは汎用プランに使われない）
     CREATE_BOT_INDEX = """
     CREATE INDEX IF NOT EXISTS idx_voice_sessions_bot_id ON voice_sessions (bot_id);
     """
@@ -35,6 +62,11 @@ class VoiceSessionQueries:
     DELETE FROM voice_sessions WHERE guild_id = $1;
     """
 
+    # 複数ギルドのセッションを一括削除（復元できなかったセッションの後片付け用）
+    DELETE_SESSIONS = """
+    DELETE FROM voice_sessions WHERE guild_id = ANY($1::BIGINT[]);
+    """
+
     # 特定のBot IDのセッションを全取得（再起動時の復元用）
     GET_SESSIONS_BY_BOT = """
     SELECT guild_id, voice_channel_id, text_channel_id, connected_at 
@@ -0,0 +1,49 @@
+# src/utils/kana.py
+import re
+
+import jaconv
+
+# 辞書の読み方として受け付ける文字（全角カタカナと長音記号）
+_KATAKANA_RE = re.compile(r'[ァ-ヶーヴ]+')
+
+# 変換表を作る対象（ひらがな・半角カナ）
+_HIRAGANA = [chr(code) for code in range(0x3041, 0x30A0)]
+_HALFWIDTH_KANA = [chr(code) for code in range(0xFF61, 0xFFA0)]
+
+
+def _normalize_with_jaconv(text: str) -> str:
+    return jaconv.hira2kata(jaconv.h2z(text, kana=True, digit=False, ascii=False))
+
+
+# jaconv.h2z(kana=True) が1文字にまとめる半角の濁点・半濁点付きカナ
+_DAKUTEN_MAP = {
+    base + mark: converted
+    for base in _HALFWIDTH_KANA
+    for mark in "ﾞﾟ"
+    if len(converted := _normalize_with_jaconv(base + mark)) == 1
+}
+_DAKUTEN_RE = re.compile("|".join(_DAKUTEN_MAP))
+
+# 半角カナ→全角カナ と ひらがな→カタカナ を1回の str.translate で行う変換表
+# （jaconv の公開 API で1文字ずつ変換して作る）
+_READING_TABLE = {
+    ord(char): converted
+    for char in _HIRAGANA + _HALFWIDTH_KANA
+    if (converted := _normalize_with_jaconv(char)) != char
+}
+
+
+def to_katakana_reading(text: str) -> str:
+    """
+    辞書の読み方を全角カタカナに揃える
+
+    jaconv.hira2kata(jaconv.h2z(text, kana=True, digit=False, ascii=False)) と同じ結果を、
+    濁点の結合1回と変換表1回で返す。
+    """
+    if "ﾞ" in text or "ﾟ" in text:
+        text = _DAKUTEN_RE.sub(lambda m: _DAKUTEN_MAP[m.group()], text)
+    return text.translate(_READING_TABLE)
+
+
+def is_katakana(text: str) -> bool:
+    return _KATAKANA_RE.fullmatch(text) is not None
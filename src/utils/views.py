@@ -1,10 +1,76 @@
+import asyncio
+from collections import OrderedDict
+
 import discord
+from src.core.models import GuildSettings
+from src.utils.kana import is_katakana, to_katakana_reading
 from src.utils.logger import logger
 
 # 1ページあたりの表示件数
 DICTIONARY_PAGE_SIZE = 20
 
 
+async def _get_editable_guild_settings(db, guild_id: int):
+    """書き換え用のギルド設定を取得する
+
+    get_guild_settings はキャッシュ済みのインスタンスをそのまま返すため、
+    コピーを編集して set_guild_settings に渡す（保存に失敗してもキャッシュが汚れない）
+    """
+    settings = await db.get_guild_settings(guild_id)
+    return settings.model_copy(deep=True)
+
+
+class MessageEditDebouncer:
+    """
+    同じメッセージへの Embed 編集を短時間まとめ、最後の内容だけを送る
+
+    設定パネルを続けて操作しても Discord API への編集は1回で済み、
+    前回送った内容と変わらなければ編集自体を省く。
+    同じメッセージを他の経路で編集した場合は forget を呼ぶ（前回送った内容が表示中とは限らなくなるため）。
+    """
+    DELAY = 0.15
+    # 送信済みの Embed を覚えておくメッセージ数の上限
+    MAX_TRACKED_MESSAGES = 256
+
+    def __init__(self):
+        self._pending: dict[int, tuple[discord.Message, discord.Embed]] = {}
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._last_sent: OrderedDict[int, dict] = OrderedDict()
+
+    def schedule(self, message: discord.Message, embed: discord.Embed):
+        """編集を予約する（待機中の編集があれば内容だけ差し替える）"""
+        self._pending[message.id] = (message, embed)
+        if message.id not in self._tasks:
+            self._tasks[message.id] = asyncio.create_task(self._flush(message.id))
+
+    def forget(self, message_id: int):
+        """前回送った内容を忘れ、次の編集は内容が同じでも送る"""
+        self._last_sent.pop(message_id, None)
+
+    async def _flush(self, message_id: int):
+        await asyncio.sleep(self.DELAY)
+        del self._tasks[message_id]
+        message, embed = self._pending.pop(message_id)
+
+        embed_data = embed.to_dict()
+        if self._last_sent.get(message_id) == embed_data:
+            return
+
+        try:
+            await message.edit(embed=embed)
+        except Exception as e:
+            logger.error(f"Embedの更新に失敗しました: {e}")
+            return
+
+        self._last_sent[message_id] = embed_data
+        self._last_sent.move_to_end(message_id)
+        if len(self._last_sent) > self.MAX_TRACKED_MESSAGES:
+            self._last_sent.popitem(last=False)
+
+
+_message_edits = MessageEditDebouncer()
+
+
 async def update_config_message(bot, interaction, settings, original_message):
     """元の設定メッセージのEmbedを最新の状態に更新する共通処理"""
     voice_cog = bot.get_cog("Voice")
@@ -12,11 +78,29 @@ async def update_config_message(bot, interaction, settings, original_message):
         try:
             is_boosted = await bot.db.is_guild_boosted(interaction.guild.id)
             new_embed = voice_cog.create_config_embed(interaction.guild, settings, is_boosted)
-            await original_message.edit(embed=new_embed)
+            # 編集は待たずに予約し、連続した操作の分はまとめて1回で送る
+            _message_edits.schedule(original_message, new_embed)
         except Exception as e:
             logger.error(f"config embedの更新に失敗しました: {e}")
 
 
+def _field_bounds(key: str) -> tuple[int | None, int | None]:
+    """数値項目の下限・上限（GuildSettings の ge/le 制約から取る）"""
+    lower = upper = None
+    for constraint in GuildSettings.model_fields[key].metadata:
+        lower = getattr(constraint, "ge", lower)
+        upper = getattr(constraint, "le", upper)
+    return lower, upper
+
+
+# 数値項目ごとの入力範囲（モデルと同じ範囲で、DB に書き込む前に弾く）
+_NUMERIC_BOUNDS = {
+    key: _field_bounds(key)
+    for key, field in GuildSettings.model_fields.items()
+    if field.annotation is int
+}
+
+
 # 数値入力用のモーダル
 class ConfigEditModal(discord.ui.Modal):
     def __init__(self, item_name: str, item_key: str, current_value: int, db, bot, original_message):
@@ -38,17 +122,25 @@ class ConfigEditModal(discord.ui.Modal):
 
     async def on_submit(self, interaction: discord.Interaction):
         value = self.value_input.value
-        if not value.isdigit():
+        if not value.isdecimal():
             return await interaction.response.send_message("❌ 数値を入力してください。", ephemeral=True)
 
         new_value = int(value)
-        settings = await self.db.get_guild_settings(interaction.guild.id)
-        old_value = getattr(settings, self.item_key)
+        lower, upper = _NUMERIC_BOUNDS.get(self.item_key, (None, None))
+        if (lower is not None and new_value < lower) or (upper is not None and new_value > upper):
+            return await interaction.response.send_message(
+                f"❌ {lower}〜{upper} の範囲で入力してください。", ephemeral=True
+            )
 
-        is_boosted = await self.db.is_guild_boosted(interaction.guild.id)
-        if int(value) > 50:
-            if not is_boosted:
-                return await interaction.response.send_message("❌ サーバーがブーストされていません。", ephemeral=True)
+        # ブースト状態は上限を超える場合にだけ確認する
+        if new_value > 50 and not await self.db.is_guild_boosted(interaction.guild.id):
+            return await interaction.response.send_message("❌ サーバーがブーストされていません。", ephemeral=True)
+
+        # 選択時のスナップショットではなく送信時点の設定に書き込む（他項目の同時変更を巻き戻さない）
+        settings = await _get_editable_guild_settings(self.db, interaction.guild.id)
+        old_value = getattr(settings, self.item_key)
+        if new_value == old_value:
+            return await interaction.response.send_message(f"✅ 設定は既に **`{new_value}`** です。", ephemeral=True)
 
         try:
             setattr(settings, self.item_key, new_value)
@@ -82,9 +174,7 @@ class ConfigToggleView(discord.ui.View):
     )
     async def select_toggle(self, interaction: discord.Interaction, select: discord.ui.Select):
         new_value = select.values[0] == "True"
-        settings = await self.db.get_guild_settings(interaction.guild.id)
-        old_value = getattr(settings, self.item_key)
-
+        settings = await _get_editable_guild_settings(self.db, interaction.guild.id)
         setattr(settings, self.item_key, new_value)
         await self.db.set_guild_settings(interaction.guild.id, settings)
 
@@ -132,18 +222,9 @@ class ConfigAutoJoinView(discord.ui.View):
         if not self.selected_vc or not self.selected_tc:
             return await interaction.response.send_message("❌ VCとTCの両方を選択してください。", ephemeral=True)
 
-        settings = await self.db.get_guild_settings(interaction.guild.id)
-        if settings.auto_join_config is None:
-            settings.auto_join_config = {}
-
-        bot_key = str(self.bot.user.id)
-        settings.auto_join_config[bot_key] = {
-            "voice": self.selected_vc.id,
-            "text": self.selected_tc.id
-        }
-        settings.auto_join = True
-
-        await self.db.set_guild_settings(interaction.guild.id, settings)
+        settings = await self.db.set_auto_join_for_bot(
+            interaction.guild.id, self.bot.user.id, self.selected_vc.id, self.selected_tc.id
+        )
 
         await update_config_message(self.bot, interaction, settings, self.original_message)
 
@@ -154,29 +235,14 @@ class ConfigAutoJoinView(discord.ui.View):
 
     @discord.ui.button(label="設定を削除", style=discord.ButtonStyle.danger, emoji="🗑️")
     async def delete_config(self, interaction: discord.Interaction, button: discord.ui.Button):
-        settings = await self.db.get_guild_settings(interaction.guild.id)
+        settings = await self.db.remove_auto_join_for_bot(interaction.guild.id, self.bot.user.id)
 
-        if settings.auto_join_config is None:
+        if settings is None:
             return await interaction.response.send_message(
                 "❌ このBotの自動接続設定は登録されていません。",
                 ephemeral=True
             )
 
-        bot_key = str(self.bot.user.id)
-
-        if bot_key not in settings.auto_join_config:
-            return await interaction.response.send_message(
-                "❌ このBotの自動接続設定は登録されていません。",
-                ephemeral=True
-            )
-
-        del settings.auto_join_config[bot_key]
-
-        if not settings.auto_join_config:
-            settings.auto_join = False
-
-        await self.db.set_guild_settings(interaction.guild.id, settings)
-
         await update_config_message(self.bot, interaction, settings, self.original_message)
 
         return await interaction.response.send_message(
@@ -185,6 +251,34 @@ class ConfigAutoJoinView(discord.ui.View):
         )
 
 
+# 設定パネルの項目（選択肢とラベル引きを同じ定義から作る）
+_CONFIG_SEARCH_OPTIONS = [
+    discord.SelectOption(label="自動接続（Bot個別設定）", value="auto_join",
+                         description="どのVCを監視し、どのTCで読み上げるか", emoji="🤖"),
+    discord.SelectOption(label="文字数制限", value="max_chars", description="読み上げる最大文字数 (10-500)",
+                         emoji="📝"),
+    discord.SelectOption(label="入退出通知", value="read_vc_status", description="ユーザーの入退室を通知",
+                         emoji="🚪"),
+    discord.SelectOption(label="メンション", value="read_mention", description="メンションを名前で読み上げるか",
+                         emoji="🆔"),
+    discord.SelectOption(label="さん付け", value="add_suffix", description="名前に「さん」を付けるか",
+                         emoji="🎀"),
+    discord.SelectOption(label="ローマ字読み", value="read_romaji", description="ローマ字をそのまま読むか",
+                         emoji="🔤"),
+    discord.SelectOption(label="添付ファイル", value="read_attachments", description="ファイル名を読み上げるか",
+                         emoji="📎"),
+    discord.SelectOption(label="絵文字", value="read_emoji", description="絵文字を読み上げるか",
+                         emoji="😀"),
+    discord.SelectOption(label="コードブロック", value="skip_code_blocks", description="コードをスキップするか",
+                         emoji="💻"),
+    discord.SelectOption(label="URL省略", value="skip_urls", description="URLを省略して読むか",
+                         emoji="🔗"),
+    discord.SelectOption(label="設定パネルを閉じる", value="close", description="このメッセージを削除します",
+                         emoji="🗑️")
+]
+_CONFIG_LABELS = {option.value: option.label for option in _CONFIG_SEARCH_OPTIONS}
+
+
 # メインの項目選択 View
 class ConfigSearchView(discord.ui.View):
     def __init__(self, db, bot):
@@ -195,30 +289,7 @@ class ConfigSearchView(discord.ui.View):
 
     @discord.ui.select(
         placeholder="設定する項目を選んでください",
-        options=[
-            discord.SelectOption(label="自動接続（Bot個別設定）", value="auto_join",
-                                 description="どのVCを監視し、どのTCで読み上げるか", emoji="🤖"),
-            discord.SelectOption(label="文字数制限", value="max_chars", description="読み上げる最大文字数 (10-500)",
-                                 emoji="📝"),
-            discord.SelectOption(label="入退出通知", value="read_vc_status", description="ユーザーの入退室を通知",
-                                 emoji="🚪"),
-            discord.SelectOption(label="メンション", value="read_mention", description="メンションを名前で読み上げるか",
-                                 emoji="🆔"),
-            discord.SelectOption(label="さん付け", value="add_suffix", description="名前に「さん」を付けるか",
-                                 emoji="🎀"),
-            discord.SelectOption(label="ローマ字読み", value="read_romaji", description="ローマ字をそのまま読むか",
-                                 emoji="🔤"),
-            discord.SelectOption(label="添付ファイル", value="read_attachments", description="ファイル名を読み上げるか",
-                                 emoji="📎"),
-            discord.SelectOption(label="絵文字", value="read_emoji", description="絵文字を読み上げるか",
-                                 emoji="😀"),
-            discord.SelectOption(label="コードブロック", value="skip_code_blocks", description="コードをスキップするか",
-                                 emoji="💻"),
-            discord.SelectOption(label="URL省略", value="skip_urls", description="URLを省略して読むか",
-                                 emoji="🔗"),
-            discord.SelectOption(label="設定パネルを閉じる", value="close", description="このメッセージを削除します",
-                                 emoji="🗑️")
-        ]
+        options=_CONFIG_SEARCH_OPTIONS
     )
     async def select_item(self, interaction: discord.Interaction, select: discord.ui.Select):
         item_key = select.values[0]
@@ -227,6 +298,7 @@ class ConfigSearchView(discord.ui.View):
             try:
                 await interaction.message.delete()
             except Exception:
+                _message_edits.forget(interaction.message.id)
                 await interaction.response.edit_message(content="✅ パネルを閉じました。", embed=None, view=None)
             return None
 
@@ -242,7 +314,7 @@ class ConfigSearchView(discord.ui.View):
 
         settings = await self.db.get_guild_settings(interaction.guild.id)
         current_value = getattr(settings, item_key)
-        item_label = [opt.label for opt in select.options if opt.value == item_key][0]
+        item_label = _CONFIG_LABELS[item_key]
 
         if isinstance(current_value, bool):
             return await interaction.response.send_message(
@@ -322,6 +394,7 @@ class DictionaryView(discord.ui.View):
     async def _update_message(self, interaction: discord.Interaction):
         self._update_buttons()
         embed = create_dictionary_embed(self.words_dict, self.current_page)
+        _message_edits.forget(interaction.message.id)
         await interaction.response.edit_message(embed=embed, view=self)
 
     @discord.ui.button(label="≪", style=discord.ButtonStyle.secondary, row=0)
@@ -383,18 +456,11 @@ class DictionaryAddModal(discord.ui.Modal):
         self.add_item(self.reading_input)
 
     async def on_submit(self, interaction: discord.Interaction):
-        import jaconv
-        import re
-
         word = self.word_input.value.strip()
         reading = self.reading_input.value.strip()
 
-        def is_katakana(text: str) -> bool:
-            return re.fullmatch(r'^[ァ-ヶーヴ]+$', text) is not None
-
         try:
-            normalized_reading = jaconv.h2z(reading, kana=True, digit=False, ascii=False)
-            normalized_reading = jaconv.hira2kata(normalized_reading)
+            normalized_reading = to_katakana_reading(reading)
         except Exception as e:
             logger.error(f"[{interaction.guild.id}] 読み方の正規化に失敗しました: {e}")
             return await interaction.response.send_message(
@@ -433,8 +499,7 @@ class DictionaryAddModal(discord.ui.Modal):
                     ephemeral=True
                 )
 
-            words_dict[word] = normalized_reading
-            await self.db.add_or_update_dict(interaction.guild.id, words_dict)
+            await self.db.add_dict_entry(interaction.guild.id, word, normalized_reading)
 
             logger.success(f"[{interaction.guild.id}] 辞書登録: {word} -> {normalized_reading}")
             await interaction.response.send_message(
@@ -457,6 +522,7 @@ class DictionaryAddModal(discord.ui.Modal):
                 await self.dictionary_view._refresh_dict(interaction.guild.id)
                 self.dictionary_view._update_buttons()
                 embed = create_dictionary_embed(self.dictionary_view.words_dict, self.dictionary_view.current_page)
+                _message_edits.forget(self.dictionary_view.message.id)
                 await self.dictionary_view.message.edit(embed=embed, view=self.dictionary_view)
             except Exception as e:
                 logger.error(f"辞書 embedの更新に失敗しました: {e}")
@@ -482,29 +548,20 @@ class DictionaryRemoveModal(discord.ui.Modal):
         word = self.word_input.value.strip()
 
         try:
-            words_dict = await self.db.get_dict(interaction.guild.id)
+            removed = await self.db.remove_dict_entry(interaction.guild.id, word)
 
-            if not words_dict or not isinstance(words_dict, dict) or word not in words_dict:
+            if not removed:
                 return await interaction.response.send_message(
                     embed=discord.Embed(title="⚠️ 単語が見つかりません", description=f"`{word}` は辞書に登録されていません。", color=discord.Color.orange()),
                     ephemeral=True
                 )
 
-            del words_dict[word]
-            success = await self.db.add_or_update_dict(interaction.guild.id, words_dict)
-
-            if success:
-                logger.success(f"[{interaction.guild.id}] 辞書削除: {word}")
-                await interaction.response.send_message(
-                    embed=discord.Embed(title="✅ 単語を削除しました", description=f"`{word}` を辞書から削除しました。", color=discord.Color.green()),
-                    ephemeral=True
-                )
-                await self._update_dictionary_view(interaction)
-            else:
-                return await interaction.response.send_message(
-                    embed=discord.Embed(title="⚠️ 削除失敗", description="削除に失敗しました。", color=discord.Color.orange()),
-                    ephemeral=True
-                )
+            logger.success(f"[{interaction.guild.id}] 辞書削除: {word}")
+            await interaction.response.send_message(
+                embed=discord.Embed(title="✅ 単語を削除しました", description=f"`{word}` を辞書から削除しました。", color=discord.Color.green()),
+                ephemeral=True
+            )
+            await self._update_dictionary_view(interaction)
 
         except Exception as e:
             logger.error(f"[{interaction.guild.id}] 辞書操作中にエラーが発生しました: {e}")
@@ -519,6 +576,7 @@ class DictionaryRemoveModal(discord.ui.Modal):
                 await self.dictionary_view._refresh_dict(interaction.guild.id)
                 self.dictionary_view._update_buttons()
                 embed = create_dictionary_embed(self.dictionary_view.words_dict, self.dictionary_view.current_page)
+                _message_edits.forget(self.dictionary_view.message.id)
                 await self.dictionary_view.message.edit(embed=embed, view=self.dictionary_view)
             except Exception as e:
                 logger.error(f"辞書 embedの更新に失敗しました: {e}")
@@ -531,6 +589,6 @@ async def update_dictionary_message(bot, interaction, original_message):
         try:
             words_dict = await voice_cog._get_guild_dict(interaction)
             embed = create_dictionary_embed(words_dict)
-            await original_message.edit(embed=embed)
+            _message_edits.schedule(original_message, embed)
         except Exception as e:
             logger.error(f"辞書 embedの更新に失敗しました: {e}")
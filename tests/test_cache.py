@@ -91,6 +91,14 @@ class TestSettingsCache:
 
         assert cache.get_boost_count(123) == 3
 
+    def test_boost_counts_bulk_set(self, cache: SettingsCache):
+        """ブーストカウントの一括設定（上限を超えた分は追い出される）"""
+        cache.boost_counts._max_size = 2
+        cache.set_boost_counts_bulk_sync({1: 1, 2: 2, 3: 3})
+
+        assert len(cache.boost_counts) == 2
+        assert cache.get_boost_count_sync(3) == 3
+
     def test_boost_count_increment(self, cache: SettingsCache):
         """ブーストカウントのインクリメント"""
         cache.set_boost_count(123, 2)
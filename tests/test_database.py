@@ -9,6 +9,14 @@ import json
 from unittest.mock import AsyncMock, MagicMock, patch
 from src.core.database import Database
 from src.core.models import GuildSettings
+from src.queries import BillingQueries, DictQueries, GuildSettingsQueries
+
+
+def deliver_notification(database: Database, payload: str):
+    """リスナーのコールバックに通知を渡し、時間窓を待たずにバッファを処理する"""
+    database._on_notification(None, 0, "settings_change", payload)
+    database._notification_flush_handle.cancel()
+    database._flush_notifications()
 
 
 class TestDatabase:
@@ -24,6 +32,11 @@ class TestDatabase:
         """Mock asyncpg connection pool"""
         pool = MagicMock()
         pool.close = AsyncMock()
+        pool.release = AsyncMock()
+        pool.execute = AsyncMock()
+        pool.fetch = AsyncMock(return_value=[])
+        pool.fetchrow = AsyncMock(return_value=None)
+        pool.fetchval = AsyncMock(return_value=None)
         return pool
 
     @pytest.fixture
@@ -35,6 +48,7 @@ class TestDatabase:
         conn.fetchrow = AsyncMock(return_value=None)
         conn.fetchval = AsyncMock(return_value=None)
         conn.add_listener = AsyncMock()
+        conn.remove_listener = AsyncMock()
         conn.is_closed = MagicMock(return_value=False)
         conn.close = AsyncMock()
         return conn
@@ -50,6 +64,28 @@ class TestDatabase:
         assert database._listener_task is None
         assert database._shutdown is False
 
+    def test_pool_size_env_is_clamped(self):
+        """プールの最大はリスナー分を含めて2以上、最小は最大以下"""
+        with patch.dict("os.environ", {"POSTGRES_POOL_MIN": "10", "POSTGRES_POOL_MAX": "1"}):
+            database = Database()
+
+        assert database._pool_max_size == 2
+        assert database._pool_min_size == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_connect_creates_one_pool(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """connect が同時に呼ばれてもプールは1つだけ作る"""
+        async def slow_create_pool(**kwargs):
+            await asyncio.sleep(0.01)
+            return mock_asyncpg_pool
+
+        with patch("src.core.database.asyncpg.create_pool", side_effect=slow_create_pool) as create_pool, \
+                patch.object(database, "_check_pool_size", AsyncMock()):
+            await asyncio.gather(database.connect(), database.connect())
+
+        create_pool.assert_called_once()
+        assert database.pool is mock_asyncpg_pool
+
     # ========================================
     # ギルド設定テスト
     # ========================================
@@ -69,17 +105,10 @@ class TestDatabase:
         database.pool = mock_asyncpg_pool
 
         # DB からの返却値を設定
-        mock_conn = AsyncMock()
-        mock_conn.fetchrow = AsyncMock(return_value={
-            "settings": json.dumps({"auto_join": True, "max_chars": 100})
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value={
+            "settings": {"auto_join": True, "max_chars": 100}
         })
 
-        # Context manager setup
-        mock_context = AsyncMock()
-        mock_context.__aenter__ = AsyncMock(return_value=mock_conn)
-        mock_context.__aexit__ = AsyncMock(return_value=None)
-        mock_asyncpg_pool.acquire = MagicMock(return_value=mock_context)
-
         result = await database.get_guild_settings(123)
 
         assert result.auto_join is True
@@ -92,36 +121,72 @@ class TestDatabase:
         """DB にも存在しない場合はデフォルト値を返す"""
         database.pool = mock_asyncpg_pool
 
-        mock_conn = AsyncMock()
-        mock_conn.fetchrow = AsyncMock(return_value=None)
-
-        mock_context = AsyncMock()
-        mock_context.__aenter__ = AsyncMock(return_value=mock_conn)
-        mock_context.__aexit__ = AsyncMock(return_value=None)
-        mock_asyncpg_pool.acquire = MagicMock(return_value=mock_context)
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value=None)
 
         result = await database.get_guild_settings(999)
 
         assert result.auto_join is False  # デフォルト値
         assert result.max_chars == 50  # デフォルト値
 
+        # 未設定のギルドも2回目以降は DB に問い合わせない
+        assert await database.get_guild_settings(999) is result
+        mock_asyncpg_pool.fetchrow.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_set_guild_settings(self, database: Database, mock_asyncpg_pool: MagicMock):
         """ギルド設定の保存"""
         database.pool = mock_asyncpg_pool
 
-        mock_conn = AsyncMock()
-        mock_conn.execute = AsyncMock()
-
-        mock_context = AsyncMock()
-        mock_context.__aenter__ = AsyncMock(return_value=mock_conn)
-        mock_context.__aexit__ = AsyncMock(return_value=None)
-        mock_asyncpg_pool.acquire = MagicMock(return_value=mock_context)
+        mock_asyncpg_pool.fetchval = AsyncMock(return_value=100)
 
         settings = GuildSettings(auto_join=True, max_chars=150)
         await database.set_guild_settings(123, settings)
 
-        mock_conn.execute.assert_called_once()
+        mock_asyncpg_pool.fetchval.assert_called_once()
+        assert database.cache.get_guild_settings_sync(123) is settings
+
+    @pytest.mark.asyncio
+    async def test_set_guild_settings_skips_write_through_older_than_notify(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """後の書き込みの NOTIFY を反映済みなら、遅れて走った Write-through でキャッシュを巻き戻さない"""
+        database.pool = mock_asyncpg_pool
+        mock_asyncpg_pool.fetchval = AsyncMock(return_value=100)
+        deliver_notification(database, json.dumps({
+            "table": "guild_settings",
+            "operation": "UPDATE",
+            "id": 123,
+            "lsn": 200,
+            "data": {"max_chars": 200}
+        }))
+
+        await database.set_guild_settings(123, GuildSettings(max_chars=150))
+
+        assert database.cache.get_guild_settings_sync(123).max_chars == 200
+
+    @pytest.mark.asyncio
+    async def test_set_auto_join_for_bot_writes_returned_settings_through(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """Bot ごとの自動接続設定は1文で保存し、DB が返した設定をキャッシュする"""
+        database.pool = mock_asyncpg_pool
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value={
+            "settings": '{"auto_join": true, "max_chars": 120, "auto_join_config": {"111": {"voice": 1, "text": 2}}}',
+            "lsn": 100
+        })
+
+        result = await database.set_auto_join_for_bot(123, 111, 1, 2)
+
+        mock_asyncpg_pool.fetchrow.assert_awaited_once_with(GuildSettingsQueries.SET_AUTO_JOIN_FOR_BOT, 123, "111", 1, 2)
+        assert result.max_chars == 120
+        assert database.cache.get_guild_settings_sync(123) is result
+
+    @pytest.mark.asyncio
+    async def test_remove_auto_join_for_bot_not_registered(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """登録されていない Bot の削除は None を返し、キャッシュを変えない"""
+        database.pool = mock_asyncpg_pool
+        settings = GuildSettings(auto_join=True)
+        database.cache.set_guild_settings_sync(123, settings)
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value=None)
+
+        assert await database.remove_auto_join_for_bot(123, 111) is None
+        assert database.cache.get_guild_settings_sync(123) is settings
 
     # ========================================
     # ユーザー設定テスト
@@ -137,24 +202,33 @@ class TestDatabase:
         assert result["speaker"] == 2
         assert result["speed"] == 1.5
 
+    @pytest.mark.asyncio
+    async def test_get_user_setting_cache_miss(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """キャッシュミス時は取得した行をそのまま返してキャッシュする"""
+        database.pool = mock_asyncpg_pool
+        row = {"speaker": 3, "speed": 1.2, "pitch": 0.1}
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value=row)
+
+        assert await database.get_user_setting(456) is row
+        assert await database.get_user_setting(456) is row
+        mock_asyncpg_pool.fetchrow.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_get_user_setting_default(self, database: Database, mock_asyncpg_pool: MagicMock):
         """デフォルトのユーザー設定"""
         database.pool = mock_asyncpg_pool
 
-        mock_conn = AsyncMock()
-        mock_conn.fetchrow = AsyncMock(return_value=None)
-
-        mock_context = AsyncMock()
-        mock_context.__aenter__ = AsyncMock(return_value=mock_conn)
-        mock_context.__aexit__ = AsyncMock(return_value=None)
-        mock_asyncpg_pool.acquire = MagicMock(return_value=mock_context)
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value=None)
 
         result = await database.get_user_setting(999)
 
         assert result["speaker"] == 1
         assert result["speed"] == 1.0
         assert result["pitch"] == 0.0
+        # デフォルト値は毎回作らず、読み取り専用の共有インスタンスを返す
+        assert await database.get_user_setting(998) is result
+        with pytest.raises(TypeError):
+            result["speed"] = 2.0
 
     # ========================================
     # 辞書テスト
@@ -176,26 +250,150 @@ class TestDatabase:
 
         assert result == {}
 
+    @pytest.mark.asyncio
+    async def test_get_dict_concurrent_misses_share_fetch(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """同時のキャッシュミスは1回のDB取得を共有する"""
+        database.pool = mock_asyncpg_pool
+
+        async def slow_fetchrow(*args):
+            await asyncio.sleep(0.01)
+            return {"dict": {"test": "テスト"}}
+
+        mock_asyncpg_pool.fetchrow = AsyncMock(side_effect=slow_fetchrow)
+
+        results = await asyncio.gather(*(database.get_dict(123) for _ in range(5)))
+
+        assert all(result == {"test": "テスト"} for result in results)
+        mock_asyncpg_pool.fetchrow.assert_called_once()
+        assert database._dict_inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_get_dict_inactive_guild_uses_short_lived_cache(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """VC未接続ギルドの辞書は短時間キャッシュされ、連続した読み込みでDBに行かない"""
+        database.pool = mock_asyncpg_pool
+
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value=None)
+
+        assert await database.get_dict(123) == {}
+        assert await database.get_dict(123) == {}
+
+        mock_asyncpg_pool.fetchrow.assert_called_once()
+        assert database.cache.get_dict_sync(123) is None
+
+    @pytest.mark.asyncio
+    async def test_get_dict_active_guild_without_row_is_cached(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """辞書の無いVC接続中ギルドでも、メッセージごとにDBに行かない"""
+        database.pool = mock_asyncpg_pool
+        await database.cache.add_active_guild(123)
+
+        assert await database.get_dict(123) == {}
+        assert await database.get_dict(123) == {}
+
+        mock_asyncpg_pool.fetchrow.assert_awaited_once()
+        assert database.cache.is_dict_loaded(123) is True
+
     @pytest.mark.asyncio
     async def test_load_guild_dict(self, database: Database, mock_asyncpg_pool: MagicMock):
         """VC接続時の辞書ロード"""
         database.pool = mock_asyncpg_pool
 
-        mock_conn = AsyncMock()
-        mock_conn.fetchrow = AsyncMock(return_value={
-            "dict": json.dumps({"test": "テスト"})
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value={
+            "dict": {"test": "テスト"}
         })
 
-        mock_context = AsyncMock()
-        mock_context.__aenter__ = AsyncMock(return_value=mock_conn)
-        mock_context.__aexit__ = AsyncMock(return_value=None)
-        mock_asyncpg_pool.acquire = MagicMock(return_value=mock_context)
-
         await database.load_guild_dict(123)
 
         assert database.cache.is_guild_active(123) is True
         assert database.cache.is_dict_loaded(123) is True
 
+    @pytest.mark.asyncio
+    async def test_load_guild_dict_fetches_unloaded_global_dict_together(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """グローバル辞書が未ロードならギルド辞書と1回のクエリで取得する"""
+        database.pool = mock_asyncpg_pool
+        database.cache.global_dict_id = 999
+        mock_asyncpg_pool.fetch = AsyncMock(return_value=[
+            {"guild_id": 123, "dict": {"test": "テスト"}},
+        ])
+
+        await database.load_guild_dict(123)
+
+        mock_asyncpg_pool.fetch.assert_awaited_once()
+        mock_asyncpg_pool.fetchrow.assert_not_called()
+        assert await database.get_dict(123) == {"test": "テスト"}
+        # 行の無いグローバル辞書も空としてロード済みにする
+        assert database.cache.is_dict_loaded(999) is True
+
+    @pytest.mark.asyncio
+    async def test_prefetch_guild_dicts_serves_later_loads(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """一括取得した辞書は、続く VC 接続時のロードで DB に行かずに使われる"""
+        database.pool = mock_asyncpg_pool
+        mock_asyncpg_pool.fetch = AsyncMock(return_value=[
+            {"guild_id": 123, "dict": {"test": "テスト"}},
+        ])
+
+        await database.prefetch_guild_dicts([123, 456])
+        await database.load_guild_dict(123)
+        await database.load_guild_dict(456)
+
+        mock_asyncpg_pool.fetch.assert_awaited_once()
+        mock_asyncpg_pool.fetchrow.assert_not_called()
+        assert await database.get_dict(123) == {"test": "テスト"}
+        assert await database.get_dict(456) == {}
+
+    @pytest.mark.asyncio
+    async def test_prefetch_guild_dicts_outlives_recent_dict_cache(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """一括取得した辞書は短時間キャッシュの上限・期限に左右されず、接続中の辞書として残る"""
+        database.pool = mock_asyncpg_pool
+        database.cache.recent_dicts._max_size = 1
+        database.cache.recent_dicts._ttl_seconds = 0
+        mock_asyncpg_pool.fetch = AsyncMock(return_value=[
+            {"guild_id": 123, "dict": {"test": "テスト"}},
+        ])
+
+        await database.prefetch_guild_dicts([123, 456, 789])
+        for guild_id in (123, 456, 789):
+            await database.load_guild_dict(guild_id)
+
+        mock_asyncpg_pool.fetch.assert_awaited_once()
+        mock_asyncpg_pool.fetchrow.assert_not_called()
+        assert database.cache.get_dict_sync(123) == {"test": "テスト"}
+
+    @pytest.mark.asyncio
+    async def test_prefetched_dict_invalidated_via_notify(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """一括取得した辞書も、接続前に届いた変更通知で無効化される"""
+        database.pool = mock_asyncpg_pool
+        mock_asyncpg_pool.fetch = AsyncMock(return_value=[
+            {"guild_id": 123, "dict": {"test": "テスト"}},
+        ])
+
+        await database.prefetch_guild_dicts([123])
+        database._handle_dict_change('UPDATE', 123)
+
+        assert database.cache.is_dict_loaded(123) is False
+
+    @pytest.mark.asyncio
+    async def test_add_dict_entry_writes_returned_dict_through(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """単語の追加は1件分だけ送り、DB が返した辞書でキャッシュを更新する"""
+        database.pool = mock_asyncpg_pool
+        await database.cache.add_active_guild(123)
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value={"dict": {"old": "オールド", "test": "テスト"}, "lsn": 100})
+
+        await database.add_dict_entry(123, "test", "テスト")
+
+        mock_asyncpg_pool.fetchrow.assert_awaited_once_with(DictQueries.ADD_ENTRY, 123, "test", "テスト")
+        assert database.cache.get_dict_sync(123) == {"old": "オールド", "test": "テスト"}
+
+    @pytest.mark.asyncio
+    async def test_remove_dict_entry_missing_word(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """登録されていない単語の削除は False を返し、キャッシュを変えない"""
+        database.pool = mock_asyncpg_pool
+        await database.cache.add_active_guild(123)
+        await database.cache.set_dict(123, {"test": "テスト"})
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value=None)
+
+        assert await database.remove_dict_entry(123, "missing") is False
+        assert database.cache.get_dict_sync(123) == {"test": "テスト"}
+
     def test_unload_guild_dict(self, database: Database):
         """VC切断時の辞書アンロード"""
         database.cache.add_active_guild(123)
@@ -236,6 +434,49 @@ class TestDatabase:
 
         assert result is False
 
+    @pytest.mark.asyncio
+    async def test_deactivate_guild_boost_writes_through(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """ブースト解除は同じ文で返る解除後の件数でキャッシュを更新する"""
+        database.pool = mock_asyncpg_pool
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value={"guild_boosts": 1, "lsn": 100})
+
+        await database.cache.set_boost_count(123, 3)
+
+        assert await database.deactivate_guild_boost(123, 456) is True
+        # 1文だけを送る（接続の取得やトランザクションを挟まない）
+        mock_asyncpg_pool.fetchrow.assert_awaited_once_with(BillingQueries.DELETE_ONE_BOOST, 123, "456")
+        mock_asyncpg_pool.acquire.assert_not_called()
+        assert database.cache.get_boost_count_sync(123) == 1
+
+    @pytest.mark.asyncio
+    async def test_deactivate_guild_boost_not_found(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """解除対象が無ければ False を返し、キャッシュは変えない"""
+        database.pool = mock_asyncpg_pool
+        mock_asyncpg_pool.fetchrow = AsyncMock(return_value=None)
+
+        await database.cache.set_boost_count(123, 3)
+
+        assert await database.deactivate_guild_boost(123, 456) is False
+        assert database.cache.get_boost_count_sync(123) == 3
+
+    @pytest.mark.asyncio
+    async def test_resync_drops_entries_changed_while_disconnected(self, database: Database):
+        """再接続時の再同期では、切断中に削除された行のキャッシュを残さない"""
+        database.cache.set_boost_count_sync(123, 2)
+        database.cache.set_guild_settings_sync(123, GuildSettings(max_chars=100))
+        database.cache.set_user_setting_sync(456, {"speaker": 3, "speed": 1.0, "pitch": 0.0})
+
+        with patch.object(database, "_resync_dicts", AsyncMock()), \
+                patch.object(database, "_load_all_guild_settings", AsyncMock()) as mock_load_settings, \
+                patch.object(database, "_load_all_boost_counts", AsyncMock()) as mock_load_boosts:
+            await database._resync_cache_after_reconnect()
+
+        mock_load_settings.assert_awaited_once()
+        mock_load_boosts.assert_awaited_once()
+        assert database.cache.get_boost_count_sync(123) is None
+        assert database.cache.get_guild_settings_sync(123) is None
+        assert database.cache.get_user_setting_sync(456) is None
+
     # ========================================
     # インスタンスアクティブ判定テスト
     # ========================================
@@ -243,33 +484,56 @@ class TestDatabase:
     async def test_is_instance_active_main_bot(self, database: Database):
         """メインBot (MIN_BOOST_LEVEL=0) は常にアクティブ"""
         with patch.dict("os.environ", {"MIN_BOOST_LEVEL": "0"}):
-            result = await database.is_instance_active(123)
-            assert result is True
+            database = Database()
+        result = await database.is_instance_active(123)
+        assert result is True
 
     @pytest.mark.asyncio
     async def test_is_instance_active_skip_premium_check(self, database: Database):
         """SKIP_PREMIUM_CHECK=true の場合は常にアクティブ"""
         with patch.dict("os.environ", {"SKIP_PREMIUM_CHECK": "true", "MIN_BOOST_LEVEL": "1"}):
-            result = await database.is_instance_active(123)
-            assert result is True
+            database = Database()
+        result = await database.is_instance_active(123)
+        assert result is True
 
     @pytest.mark.asyncio
     async def test_is_instance_active_sub_bot_insufficient_boosts(self, database: Database):
         """サブBot でブースト不足の場合は非アクティブ"""
-        database.cache.set_boost_count(123, 1)  # 1ブーストのみ
-
         with patch.dict("os.environ", {"MIN_BOOST_LEVEL": "1", "SKIP_PREMIUM_CHECK": "false"}):
-            result = await database.is_instance_active(123)
-            assert result is False  # 2ブースト必要
+            database = Database()
+        await database.cache.set_boost_count(123, 1)  # 1ブーストのみ
+
+        result = await database.is_instance_active(123)
+        assert result is False  # 2ブースト必要
 
     @pytest.mark.asyncio
     async def test_is_instance_active_sub_bot_sufficient_boosts(self, database: Database):
         """サブBot でブースト十分の場合はアクティブ"""
-        database.cache.set_boost_count(123, 2)  # 2ブースト
+        with patch.dict("os.environ", {"MIN_BOOST_LEVEL": "1", "SKIP_PREMIUM_CHECK": "false"}):
+            database = Database()
+        await database.cache.set_boost_count(123, 2)  # 2ブースト
 
+        result = await database.is_instance_active(123)
+        assert result is True
+
+    def test_is_instance_active_cached(self, database: Database):
+        """キャッシュで判定できない場合のみ None を返す"""
         with patch.dict("os.environ", {"MIN_BOOST_LEVEL": "1", "SKIP_PREMIUM_CHECK": "false"}):
-            result = await database.is_instance_active(123)
-            assert result is True
+            database = Database()
+        assert database.is_instance_active_cached(123) is None
+
+        database.cache.set_boost_count_sync(123, 2)
+        assert database.is_instance_active_cached(123) is True
+
+    def test_is_guild_boosted_cached(self, database: Database):
+        """ブースト判定はキャッシュ済みのカウントだけで行う"""
+        assert database.is_guild_boosted_cached(123) is None
+
+        database.cache.set_boost_count_sync(123, 0)
+        assert database.is_guild_boosted_cached(123) is False
+
+        database.cache.set_boost_count_sync(123, 1)
+        assert database.is_guild_boosted_cached(123) is True
 
     # ========================================
     # NOTIFY ハンドラテスト
@@ -279,84 +543,86 @@ class TestDatabase:
         data = {"auto_join": True, "max_chars": 200}
         database._handle_guild_settings_change("UPDATE", 123, data)
 
-        result = database.cache.get_guild_settings(123)
+        result = database.cache.get_guild_settings_sync(123)
         assert result is not None
         assert result.auto_join is True
 
+    def test_handle_guild_settings_change_invalid_data(self, database: Database):
+        """SQL で直接書き換えられた不正な値は検証で弾き、キャッシュを無効化"""
+        database.cache.set_guild_settings_sync(123, GuildSettings())
+        data = {"max_chars": 9999, "auto_join_config": {"111": {"voice": "not-a-number"}}}
+        database._handle_guild_settings_change("UPDATE", 123, data)
+
+        assert database.cache.get_guild_settings_sync(123) is None
+
     def test_handle_guild_settings_change_delete(self, database: Database):
         """ギルド設定削除の NOTIFY ハンドリング"""
-        database.cache.set_guild_settings(123, GuildSettings())
+        database.cache.set_guild_settings_sync(123, GuildSettings())
         database._handle_guild_settings_change("DELETE", 123, None)
 
-        assert database.cache.get_guild_settings(123) is None
+        assert database.cache.get_guild_settings_sync(123) is None
+
+    def test_handle_guild_settings_change_without_data(self, database: Database):
+        """データが省かれた NOTIFY（ペイロード上限超過）はキャッシュを無効化"""
+        database.cache.set_guild_settings_sync(123, GuildSettings())
+        database._handle_guild_settings_change("UPDATE", 123, None)
+
+        assert database.cache.get_guild_settings_sync(123) is None
 
     def test_handle_user_settings_change(self, database: Database):
         """ユーザー設定変更の NOTIFY ハンドリング"""
         data = {"speaker": 3, "speed": 1.5, "pitch": 0.2}
         database._handle_user_settings_change("UPDATE", 456, data)
 
-        result = database.cache.get_user_setting(456)
+        result = database.cache.get_user_setting_sync(456)
         assert result["speaker"] == 3
 
     def test_handle_boost_change_insert(self, database: Database):
-        """ブースト追加の NOTIFY ハンドリング"""
-        database.cache.set_boost_count(123, 1)
-        database._handle_boost_change("INSERT", 123)
+        """ブースト追加の NOTIFY ハンドリング（絶対値で更新）"""
+        database.cache.set_boost_count_sync(123, 1)
+        database._handle_boost_change("INSERT", 123, {"count": 2})
 
-        assert database.cache.get_boost_count(123) == 2
+        assert database.cache.get_boost_count_sync(123) == 2
 
-    def test_handle_boost_change_delete(self, database: Database):
-        """ブースト削除の NOTIFY ハンドリング"""
-        database.cache.set_boost_count(123, 3)
-        database._handle_boost_change("DELETE", 123)
+    def test_handle_boost_change_without_count(self, database: Database):
+        """カウントのない NOTIFY はキャッシュを無効化"""
+        database.cache.set_boost_count_sync(123, 3)
+        database._handle_boost_change("DELETE", 123, None)
 
-        assert database.cache.get_boost_count(123) == 2
+        assert database.cache.get_boost_count_sync(123) is None
 
     # ========================================
     # 辞書 NOTIFY ハンドリングテスト
     # ========================================
     @pytest.mark.asyncio
     async def test_handle_dict_change_active_guild(self, database: Database):
-        """アクティブギルドの辞書変更"""
-        database.cache.add_active_guild(123)
-        database.cache.set_dict(123, {"old": "オールド"})
+        """アクティブギルドの辞書変更は無効化"""
+        await database.cache.add_active_guild(123)
+        database.cache.set_dict_sync(123, {"old": "オールド"})
 
-        await database._handle_dict_change("UPDATE", 123)
+        database._handle_dict_change("UPDATE", 123)
 
-        # 再ロードフラグがセットされる
-        assert 123 in database.cache.pending_dict_reload
+        assert database.cache.get_dict_sync(123) is None
 
-    @pytest.mark.asyncio
-    async def test_handle_dict_change_inactive_guild(self, database: Database):
+    def test_handle_dict_change_inactive_guild(self, database: Database):
         """非アクティブギルドの辞書変更は無視"""
-        database.cache.set_dict(123, {"old": "オールド"})
+        database.cache.set_dict_sync(123, {"old": "オールド"})
 
-        await database._handle_dict_change("UPDATE", 123)
+        database._handle_dict_change("UPDATE", 123)
 
         # アクティブでないので何も起きない
-        assert 123 not in database.cache.pending_dict_reload
+        assert database.cache.get_dict_sync(123) == {"old": "オールド"}
 
     @pytest.mark.asyncio
-    async def test_handle_dict_change_global_dict(self, database: Database, mock_asyncpg_pool: MagicMock):
-        """グローバル辞書の変更は即座に再ロード"""
-        database.pool = mock_asyncpg_pool
+    async def test_handle_dict_change_global_dict(self, database: Database):
+        """グローバル辞書の変更は再ロードをスケジュール"""
         database.cache.global_dict_id = 1201
 
-        mock_conn = AsyncMock()
-        mock_conn.fetchrow = AsyncMock(return_value={
-            "dict": json.dumps({"global": "グローバル"})
-        })
-
-        mock_context = AsyncMock()
-        mock_context.__aenter__ = AsyncMock(return_value=mock_conn)
-        mock_context.__aexit__ = AsyncMock(return_value=None)
-        mock_asyncpg_pool.acquire = MagicMock(return_value=mock_context)
+        with patch.object(database, "_reload_dict", new_callable=AsyncMock) as mock_reload:
+            database._handle_dict_change("UPDATE", 1201)
+            await asyncio.sleep(0)
 
-        await database._handle_dict_change("UPDATE", 1201)
-
-        # グローバル辞書は即座に再ロードされる
-        result = database.cache.get_dict(1201)
-        assert result is not None
+        mock_reload.assert_awaited_once_with(1201)
 
     # ========================================
     # クローズテスト
@@ -377,7 +643,10 @@ class TestDatabase:
 
         assert database._shutdown is True
         mock_asyncpg_pool.close.assert_called_once()
-        mock_asyncpg_connection.close.assert_called_once()
+        # リスナー接続はプールへ返却する（自前で閉じない）
+        mock_asyncpg_pool.release.assert_awaited_once_with(mock_asyncpg_connection)
+        mock_asyncpg_connection.close.assert_not_called()
+        assert database._listener_connection is None
 
     @pytest.mark.asyncio
     async def test_close_no_listener(self, database: Database, mock_asyncpg_pool: MagicMock):
@@ -404,8 +673,30 @@ class TestDatabase:
 
         await database.close()
 
-        # is_closed が True なので close は呼ばれない
+        # 切断済みの接続はプールが回収済みなので、閉じも返却もしない
         mock_conn.close.assert_not_called()
+        mock_asyncpg_pool.release.assert_not_called()
+
+    # ========================================
+    # 診断テスト
+    # ========================================
+    def test_get_diagnostics_reuses_recent_snapshot(self, database: Database, mock_asyncpg_pool: MagicMock):
+        """短時間の連続取得ではプールに問い合わせず直近の値を返す"""
+        database.pool = mock_asyncpg_pool
+        mock_asyncpg_pool.get_size = MagicMock(return_value=5)
+        mock_asyncpg_pool.get_idle_size = MagicMock(return_value=3)
+
+        first = database.get_diagnostics()
+        second = database.get_diagnostics()
+
+        assert first == second
+        assert second["pool_size"] == 5
+        mock_asyncpg_pool.get_size.assert_called_once()
+
+        # 期限切れ後は再計算する
+        database._diagnostics_cache = (float("-inf"), first)
+        database.get_diagnostics()
+        assert mock_asyncpg_pool.get_size.call_count == 2
 
 
 class TestDatabaseNotificationCallback:
@@ -425,9 +716,9 @@ class TestDatabaseNotificationCallback:
             "data": {"auto_join": True, "max_chars": 100}
         })
 
-        await database._handle_notification(payload)
+        deliver_notification(database, payload)
 
-        result = database.cache.get_guild_settings(123)
+        result = database.cache.get_guild_settings_sync(123)
         assert result is not None
         assert result.auto_join is True
 
@@ -441,31 +732,86 @@ class TestDatabaseNotificationCallback:
             "data": {"speaker": 2, "speed": 1.2, "pitch": 0.1}
         })
 
-        await database._handle_notification(payload)
+        deliver_notification(database, payload)
 
-        result = database.cache.get_user_setting(456)
+        result = database.cache.get_user_setting_sync(456)
         assert result["speaker"] == 2
 
     @pytest.mark.asyncio
     async def test_handle_notification_boost(self, database: Database):
         """guild_boosts の NOTIFY 処理"""
-        database.cache.set_boost_count(123, 1)
+        database.cache.set_boost_count_sync(123, 1)
 
         payload = json.dumps({
             "table": "guild_boosts",
             "operation": "INSERT",
             "id": 123,
-            "data": None
+            "data": {"count": 2}
         })
 
-        await database._handle_notification(payload)
+        deliver_notification(database, payload)
+
+        assert database.cache.get_boost_count_sync(123) == 2
+
+    @pytest.mark.asyncio
+    async def test_handle_notification_applies_after_own_write_through(self, database: Database):
+        """自分の Write-through より後の書き込みの通知は反映し、前の書き込みの通知は捨てる"""
+        database.pool = MagicMock()
+        database.pool.fetchval = AsyncMock(return_value=100)
+        await database.set_guild_settings(123, GuildSettings(max_chars=100))
+
+        for lsn, max_chars in ((50, 50), (200, 200)):
+            deliver_notification(database, json.dumps({
+                "table": "guild_settings",
+                "operation": "UPDATE",
+                "id": 123,
+                "lsn": lsn,
+                "data": {"max_chars": max_chars}
+            }))
+            if lsn == 50:
+                assert database.cache.get_guild_settings_sync(123).max_chars == 100
+
+        assert database.cache.get_guild_settings_sync(123).max_chars == 200
+
+    @pytest.mark.asyncio
+    async def test_on_notification_coalesces_same_key(self, database: Database):
+        """同じキーへの連続した NOTIFY は最新の1件だけ反映される"""
+        for count in (1, 2, 3):
+            payload = json.dumps({
+                "table": "guild_boosts",
+                "operation": "INSERT",
+                "id": 123,
+                "data": {"count": count}
+            })
+            database._on_notification(None, 0, "settings_change", payload)
+
+        with patch.object(database, "_handle_boost_change") as mock_handle:
+            await asyncio.sleep(database.NOTIFICATION_DEBOUNCE_WINDOW * 2)
+
+        mock_handle.assert_called_once_with("INSERT", 123, {"count": 3})
+        assert database._pending_notifications == []
 
-        assert database.cache.get_boost_count(123) == 2
+    @pytest.mark.asyncio
+    async def test_on_notification_flushes_when_buffer_full(self, database: Database):
+        """バッファが上限に達したら時間窓を待たずに処理する"""
+        database.MAX_PENDING_NOTIFICATIONS = 3
+        for guild_id in (1, 2, 3):
+            payload = json.dumps({
+                "table": "guild_boosts",
+                "operation": "INSERT",
+                "id": guild_id,
+                "data": {"count": 1}
+            })
+            database._on_notification(None, 0, "settings_change", payload)
+
+        assert database._pending_notifications == []
+        assert database._notification_flush_handle is None
+        assert database.cache.get_boost_count_sync(3) == 1
 
     @pytest.mark.asyncio
     async def test_handle_notification_invalid_json(self, database: Database):
         """無効な JSON の処理（エラーにならない）"""
-        await database._handle_notification("invalid json")  # エラーにならないことを確認
+        deliver_notification(database, "invalid json")  # エラーにならないことを確認
 
     @pytest.mark.asyncio
     async def test_handle_notification_unknown_table(self, database: Database):
@@ -477,4 +823,5 @@ class TestDatabaseNotificationCallback:
             "data": {}
         })
 
-        await database._handle_notification(payload)  # エラーにならないことを確認
+        deliver_notification(database, payload)  # エラーにならないことを確認
+
@@ -23,18 +23,10 @@ class TestCacheAndDatabaseIntegration:
     def mock_pool(self) -> MagicMock:
         """モック接続プール"""
         pool = MagicMock()
-
-        async def mock_acquire():
-            conn = AsyncMock()
-            conn.execute = AsyncMock()
-            conn.fetch = AsyncMock(return_value=[])
-            conn.fetchrow = AsyncMock(return_value=None)
-            conn.fetchval = AsyncMock(return_value=None)
-            return conn
-
-        pool.acquire = MagicMock()
-        pool.acquire.return_value.__aenter__ = AsyncMock(side_effect=mock_acquire)
-        pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+        pool.execute = AsyncMock()
+        pool.fetch = AsyncMock(return_value=[])
+        pool.fetchrow = AsyncMock(return_value=None)
+        pool.fetchval = AsyncMock(return_value=None)
         pool.close = AsyncMock()
 
         return pool
@@ -53,18 +45,16 @@ class TestCacheAndDatabaseIntegration:
 
         assert result.auto_join is True
         # DB クエリは発生していない
-        mock_pool.acquire.assert_not_called()
+        mock_pool.fetchrow.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_cache_miss_triggers_db_query(self, database: Database, mock_pool: MagicMock):
         """キャッシュミス時は DB クエリが発生する"""
         database.pool = mock_pool
 
-        mock_conn = AsyncMock()
-        mock_conn.fetchrow = AsyncMock(return_value={
-            "settings": json.dumps({"auto_join": True})
+        mock_pool.fetchrow = AsyncMock(return_value={
+            "settings": {"auto_join": True}
         })
-        mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
 
         # キャッシュは空
         assert database.cache.get_guild_settings(999) is None
@@ -73,7 +63,7 @@ class TestCacheAndDatabaseIntegration:
         result = await database.get_guild_settings(999)
 
         # DB クエリが発生
-        mock_pool.acquire.assert_called()
+        mock_pool.fetchrow.assert_called()
         # キャッシュに保存された
         assert database.cache.get_guild_settings(999) is not None
 
@@ -104,14 +94,10 @@ class TestDictionaryLoadUnloadFlow:
     def mock_pool(self) -> MagicMock:
         pool = MagicMock()
 
-        mock_conn = AsyncMock()
-        mock_conn.fetchrow = AsyncMock(return_value={
-            "dict": json.dumps({"hello": "ハロー"})
+        pool.fetchrow = AsyncMock(return_value={
+            "dict": {"hello": "ハロー"}
         })
 
-        pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
-        pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
-
         return pool
 
     @pytest.mark.asyncio
@@ -139,11 +125,9 @@ class TestDictionaryLoadUnloadFlow:
         """非アクティブギルドでは辞書がキャッシュに保存されない"""
         database.pool = mock_pool
 
-        mock_conn = AsyncMock()
-        mock_conn.fetchrow = AsyncMock(return_value={
-            "dict": json.dumps({"test": "テスト"})
+        mock_pool.fetchrow = AsyncMock(return_value={
+            "dict": {"test": "テスト"}
         })
-        mock_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
 
         # ギルドはアクティブでない
         assert database.cache.is_guild_active(123) is False
@@ -31,6 +31,15 @@ class TestVoiceCogHelpers:
         assert is_katakana("カタカナとひらがな") is False
         assert is_katakana("") is False
 
+    def test_to_katakana_reading_matches_jaconv(self):
+        """読み方の正規化が jaconv の h2z + hira2kata と同じ結果になる"""
+        import jaconv
+        from src.utils.kana import to_katakana_reading
+
+        for text in ("とうきょう", "ﾄｳｷｮｳ", "ｶﾞｯｺｳ", "ﾊﾟﾋﾟﾌﾟﾍﾟﾎﾟ", "ｳﾞｧｲｵﾘﾝ", "ゔぁいおりん", "ｶﾟ", "abc123"):
+            expected = jaconv.hira2kata(jaconv.h2z(text, kana=True, digit=False, ascii=False))
+            assert to_katakana_reading(text) == expected
+
     def test_format_rows_dict(self):
         """辞書形式のフォーマット"""
         from src.cogs.voice import format_rows
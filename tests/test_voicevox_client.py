@@ -6,6 +6,7 @@ Tests for VoicevoxClient
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import aiohttp
+import orjson
 from src.core.voicevox_client import VoicevoxClient
 
 
@@ -47,6 +48,22 @@ class TestVoicevoxClient:
 
         assert session is mock_session
 
+    @pytest.mark.asyncio
+    async def test_warmup_opens_connection(self, client: VoicevoxClient, mock_aiohttp_session: AsyncMock):
+        """起動時のウォームアップでセッションを使ってエンジンに接続することを確認"""
+        mock_aiohttp_session.closed = False
+        client.session = mock_aiohttp_session
+
+        version_response = AsyncMock()
+        version_response.__aenter__ = AsyncMock(return_value=version_response)
+        version_response.__aexit__ = AsyncMock(return_value=None)
+        mock_aiohttp_session.get = MagicMock(return_value=version_response)
+
+        await client.warmup()
+
+        mock_aiohttp_session.get.assert_called_once_with("http://localhost:50021/version")
+        version_response.read.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_generate_sound(self, client: VoicevoxClient, mock_aiohttp_session: AsyncMock, tmp_path):
         """音声生成のテスト"""
@@ -54,13 +71,18 @@ class TestVoicevoxClient:
 
         # Mock audio_query response
         query_response = AsyncMock()
-        query_response.json = AsyncMock(return_value={"speedScale": 1.0, "pitchScale": 0.0})
+        query_response.read = AsyncMock(return_value=b'{"speedScale": 1.0, "pitchScale": 0.0}')
         query_response.__aenter__ = AsyncMock(return_value=query_response)
         query_response.__aexit__ = AsyncMock(return_value=None)
 
         # Mock synthesis response
+        async def iter_chunked(size):
+            for chunk in (b"fake_", b"audio_data"):
+                yield chunk
+
         synthesis_response = AsyncMock()
-        synthesis_response.read = AsyncMock(return_value=b"fake_audio_data")
+        synthesis_response.content = MagicMock()
+        synthesis_response.content.iter_chunked = iter_chunked
         synthesis_response.__aenter__ = AsyncMock(return_value=synthesis_response)
         synthesis_response.__aexit__ = AsyncMock(return_value=None)
 
@@ -76,6 +98,38 @@ class TestVoicevoxClient:
         )
 
         assert result == output_path
+        with open(output_path, "rb") as f:
+            assert f.read() == b"fake_audio_data"
+
+        # 既定の速度・ピッチでは audio_query の結果をそのまま送る
+        synthesis_call = mock_aiohttp_session.post.call_args_list[1]
+        assert synthesis_call.kwargs["data"] == b'{"speedScale": 1.0, "pitchScale": 0.0}'
+
+    @pytest.mark.asyncio
+    async def test_generate_sound_applies_speed_and_pitch(self, client: VoicevoxClient, mock_aiohttp_session: AsyncMock, tmp_path):
+        """速度・ピッチを変える場合は audio_query の結果を書き換えて送る"""
+        client.session = mock_aiohttp_session
+
+        query_response = AsyncMock()
+        query_response.read = AsyncMock(return_value=b'{"speedScale": 1.0, "pitchScale": 0.0, "volumeScale": 1.0}')
+        query_response.__aenter__ = AsyncMock(return_value=query_response)
+        query_response.__aexit__ = AsyncMock(return_value=None)
+
+        async def iter_chunked(size):
+            yield b"fake_audio_data"
+
+        synthesis_response = AsyncMock()
+        synthesis_response.content = MagicMock()
+        synthesis_response.content.iter_chunked = iter_chunked
+        synthesis_response.__aenter__ = AsyncMock(return_value=synthesis_response)
+        synthesis_response.__aexit__ = AsyncMock(return_value=None)
+
+        mock_aiohttp_session.post = MagicMock(side_effect=[query_response, synthesis_response])
+
+        await client.generate_sound("テスト", speaker_id=1, speed=1.5, pitch=0.1, output_path=str(tmp_path / "out.wav"))
+
+        synthesis_call = mock_aiohttp_session.post.call_args_list[1]
+        assert orjson.loads(synthesis_call.kwargs["data"]) == {"speedScale": 1.5, "pitchScale": 0.1, "volumeScale": 1.0}
 
     @pytest.mark.asyncio
     async def test_add_user_dict(self, client: VoicevoxClient, mock_aiohttp_session: AsyncMock):